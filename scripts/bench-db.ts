@@ -0,0 +1,152 @@
+/**
+ * Query Builder Benchmark Script
+ *
+ * This script measures the per-query cost of the dialect adapters in
+ * `src/core/db/compat.ts` against raw Drizzle. It builds the query chains our
+ * hot paths use (locked select, upsert, update) with `.toSQL()` on mock
+ * databases, so no database connection is needed.
+ *
+ * Usage:
+ *   npx tsx scripts/bench-db.ts
+ *   npx tsx scripts/bench-db.ts --iterations=200000
+ */
+
+import { asc, eq } from 'drizzle-orm';
+import { drizzle as drizzleSqlite } from 'drizzle-orm/libsql';
+import { drizzle as drizzleMysql } from 'drizzle-orm/mysql2';
+import { drizzle as drizzlePostgres } from 'drizzle-orm/postgres-js';
+
+import { installMysqlCompat, installSqliteCompat } from '@/core/db/compat';
+import * as mysqlSchema from '@/config/db/schema.mysql';
+import * as postgresSchema from '@/config/db/schema.postgres';
+import * as sqliteSchema from '@/config/db/schema.sqlite';
+
+type Case = (db: any, t: any) => unknown;
+
+// Postgres style chains, as written at call sites
+const portableCases: Record<string, Case> = {
+  'locked select': (db, t) =>
+    db
+      .select()
+      .from(t.credit)
+      .where(eq(t.credit.userId, 'user'))
+      .orderBy(asc(t.credit.expiresAt))
+      .limit(1000)
+      .for('update')
+      .toSQL(),
+  upsert: (db, t) =>
+    db
+      .insert(t.creditBalance)
+      .values({ userId: 'user', balance: 1, updatedAt: new Date() })
+      .onConflictDoUpdate({
+        target: t.creditBalance.userId,
+        set: { balance: 1, updatedAt: new Date() },
+      })
+      .toSQL(),
+  update: (db, t) =>
+    db
+      .update(t.creditBalance)
+      .set({ balance: 1, updatedAt: new Date() })
+      .where(eq(t.creditBalance.userId, 'user'))
+      .toSQL(),
+};
+
+// the same chains written against each dialect's native builder
+const nativeCases: Record<string, Record<string, Case>> = {
+  postgresql: portableCases,
+  mysql: {
+    ...portableCases,
+    upsert: (db, t) =>
+      db
+        .insert(t.creditBalance)
+        .values({ userId: 'user', balance: 1, updatedAt: new Date() })
+        .onDuplicateKeyUpdate({
+          set: { balance: 1, updatedAt: new Date() },
+        })
+        .toSQL(),
+  },
+  sqlite: {
+    ...portableCases,
+    'locked select': (db, t) =>
+      db
+        .select()
+        .from(t.credit)
+        .where(eq(t.credit.userId, 'user'))
+        .orderBy(asc(t.credit.expiresAt))
+        .limit(1000)
+        .toSQL(),
+  },
+};
+
+function bench(fn: () => unknown, iterations: number) {
+  // warm up the JIT before timing
+  for (let i = 0; i < Math.min(iterations, 10000); i++) fn();
+
+  const startTime = process.hrtime.bigint();
+  for (let i = 0; i < iterations; i++) fn();
+  return Number(process.hrtime.bigint() - startTime) / iterations;
+}
+
+async function benchDb() {
+  const args = process.argv.slice(2);
+  const iterationsArg = args.find((arg) => arg.startsWith('--iterations='));
+  const iterations = iterationsArg
+    ? parseInt(iterationsArg.split('=')[1]) || 50000
+    : 50000;
+
+  const dialects = [
+    {
+      name: 'postgresql',
+      db: drizzlePostgres.mock(),
+      schema: postgresSchema,
+      install: () => {},
+    },
+    {
+      name: 'mysql',
+      db: drizzleMysql.mock(),
+      schema: mysqlSchema,
+      install: installMysqlCompat,
+    },
+    {
+      name: 'sqlite',
+      db: drizzleSqlite.mock(),
+      schema: sqliteSchema,
+      install: installSqliteCompat,
+    },
+  ];
+
+  console.log(`\n⏱  Query builder cost per query (${iterations} iterations)\n`);
+  console.log(
+    `   ${'dialect'.padEnd(12)}${'query'.padEnd(16)}${'raw'.padStart(10)}${'adapter'.padStart(10)}${'overhead'.padStart(10)}`
+  );
+
+  for (const dialect of dialects) {
+    const native = nativeCases[dialect.name];
+
+    // raw drizzle first, installing the adapter patches the builders
+    const raw: Record<string, number> = {};
+    for (const [name, run] of Object.entries(native)) {
+      raw[name] = bench(() => run(dialect.db, dialect.schema), iterations);
+    }
+
+    dialect.install();
+
+    for (const [name, run] of Object.entries(portableCases)) {
+      const adapter = bench(() => run(dialect.db, dialect.schema), iterations);
+      const overhead = ((adapter - raw[name]) / raw[name]) * 100;
+      console.log(
+        `   ${dialect.name.padEnd(12)}${name.padEnd(16)}${`${(raw[name] / 1000).toFixed(2)}µs`.padStart(10)}${`${(adapter / 1000).toFixed(2)}µs`.padStart(10)}${`${overhead.toFixed(1)}%`.padStart(10)}`
+      );
+    }
+  }
+
+  console.log(`\n✅ Done`);
+}
+
+// Run the script
+benchDb()
+  .then(() => process.exit(0))
+  .catch((error) => {
+    console.error('\n❌ Error running benchmark:', error);
+    process.exit(1);
+  });
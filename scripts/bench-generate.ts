@@ -0,0 +1,155 @@
+/**
+ * Generate Path Benchmark Script
+ *
+ * This script runs the database work of one `POST /api/ai/video/generate`
+ * request (idempotency lookup, credit debit + task insert transaction,
+ * provider task update, balance read) against the configured database and
+ * reports statements and latency per request. Provider calls are not made.
+ *
+ * Run it once per database, with `src/config/db/schema.ts` exporting the
+ * matching schema (e.g. DATABASE_PROVIDER=sqlite and DATABASE_PROVIDER=postgresql).
+ * Enable DB_SINGLETON_ENABLED=true to measure with a reused connection.
+ *
+ * Usage:
+ *   npx tsx scripts/bench-generate.ts
+ *   npx tsx scripts/bench-generate.ts --requests=500
+ */
+
+import { eq } from 'drizzle-orm';
+
+import { closeDb, db } from '@/core/db';
+import { getDbQueryCount } from '@/core/db/query-counter';
+import { envConfigs } from '@/config';
+import { user } from '@/config/db/schema';
+import { AIMediaType, AITaskStatus } from '@/extensions/ai';
+import { getUuid } from '@/shared/lib/hash';
+import {
+  attachAITaskProviderTask,
+  createAITask,
+  findAITaskByIdempotencyKey,
+} from '@/shared/models/ai_task';
+import {
+  getRemainingCredits,
+  grantCreditsForUser,
+  invalidateCreditBalanceCache,
+} from '@/shared/models/credit';
+
+const COST_CREDITS = 6;
+
+function percentile(values: number[], p: number) {
+  const sorted = [...values].sort((a, b) => a - b);
+  const index = Math.min(
+    sorted.length - 1,
+    Math.max(0, Math.ceil((p / 100) * sorted.length) - 1)
+  );
+  return sorted[index] ?? 0;
+}
+
+async function measure(
+  label: string,
+  requests: number,
+  run: (index: number) => Promise<void>
+) {
+  const latencies: number[] = [];
+  const startCount = getDbQueryCount();
+
+  for (let i = 0; i < requests; i++) {
+    const startTime = performance.now();
+    await run(i);
+    latencies.push(performance.now() - startTime);
+  }
+
+  const statements = (getDbQueryCount() - startCount) / requests;
+  console.log(
+    `   ${label.padEnd(22)} ${statements.toFixed(1).padStart(5)} statements/req  p50 ${percentile(latencies, 50).toFixed(2)}ms  p95 ${percentile(latencies, 95).toFixed(2)}ms`
+  );
+}
+
+async function benchGenerate() {
+  const args = process.argv.slice(2);
+  const requestsArg = args.find((arg) => arg.startsWith('--requests='));
+  const requests = requestsArg ? parseInt(requestsArg.split('=')[1]) || 200 : 200;
+
+  // count statements on the connections created below
+  process.env.DB_QUERY_COUNT_ENABLED = 'true';
+
+  console.log(
+    `\n⏱  Benchmarking generate path on ${envConfigs.database_provider} (${requests} requests)...`
+  );
+
+  // throwaway user with enough credits for every request
+  const benchUser = {
+    id: getUuid(),
+    name: 'bench',
+    email: `bench-${Date.now()}@example.com`,
+    emailVerified: true,
+    createdAt: new Date(),
+    updatedAt: new Date(),
+  };
+  await db().insert(user).values(benchUser);
+
+  try {
+    await grantCreditsForUser({
+      user: benchUser as any,
+      credits: COST_CREDITS * requests,
+      description: 'bench credits',
+    });
+
+    const keys: string[] = [];
+
+    await measure('generate', requests, async (i) => {
+      const idempotencyKey = `bench-${i}-${getUuid()}`;
+      keys.push(idempotencyKey);
+
+      await findAITaskByIdempotencyKey({
+        userId: benchUser.id,
+        idempotencyKey,
+      });
+      const task = await createAITask({
+        id: getUuid(),
+        userId: benchUser.id,
+        mediaType: AIMediaType.VIDEO,
+        provider: 'bench',
+        model: 'bench',
+        prompt: 'bench',
+        scene: 'text-to-video',
+        status: AITaskStatus.PENDING,
+        costCredits: COST_CREDITS,
+        idempotencyKey,
+      });
+      await attachAITaskProviderTask(task.id, {
+        status: AITaskStatus.PROCESSING,
+        taskId: `bench-${i}`,
+      });
+      // the route reads the balance after the debit invalidated the cache
+      await getRemainingCredits(benchUser.id);
+    });
+
+    await measure('idempotent replay', requests, async (i) => {
+      await findAITaskByIdempotencyKey({
+        userId: benchUser.id,
+        idempotencyKey: keys[i],
+      });
+      invalidateCreditBalanceCache(benchUser.id);
+      await getRemainingCredits(benchUser.id);
+    });
+
+    console.log(
+      '\n   transactions add BEGIN / COMMIT round trips that are not counted above'
+    );
+  } finally {
+    // tasks, credits and balance cascade with the user
+    await db().delete(user).where(eq(user.id, benchUser.id));
+  }
+
+  console.log(`\n✅ Done`);
+}
+
+// Run the script
+benchGenerate()
+  .then(() => closeDb())
+  .then(() => process.exit(0))
+  .catch((error) => {
+    console.error('\n❌ Error running benchmark:', error);
+    process.exit(1);
+  });
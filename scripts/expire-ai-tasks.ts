@@ -0,0 +1,39 @@
+/**
+ * Expire AI Task Reservations Script
+ *
+ * This script fails AI tasks that were reserved before the provider call but
+ * never got a provider task (process crash, function timeout), refunds their
+ * credits and frees their idempotency keys. Run it periodically (e.g. every
+ * few minutes from cron).
+ *
+ * Usage:
+ *   npx tsx scripts/expire-ai-tasks.ts
+ *   npx tsx scripts/expire-ai-tasks.ts --batch-size=200
+ */
+
+import { failStaleAITaskReservations } from '@/shared/models/ai_task';
+
+async function expireAITasks() {
+  const args = process.argv.slice(2);
+  const batchSizeArg = args.find((arg) => arg.startsWith('--batch-size='));
+  const batchSize = batchSizeArg
+    ? parseInt(batchSizeArg.split('=')[1]) || undefined
+    : undefined;
+
+  console.log(`\n🔄 Expiring stale AI task reservations...`);
+
+  const startTime = Date.now();
+  const failed = await failStaleAITaskReservations({ batchSize });
+
+  console.log(
+    `\n✅ Refunded ${failed} tasks in ${((Date.now() - startTime) / 1000).toFixed(1)}s`
+  );
+}
+
+// Run the script
+expireAITasks()
+  .then(() => process.exit(0))
+  .catch((error) => {
+    console.error('\n❌ Error expiring AI tasks:', error);
+    process.exit(1);
+  });
@@ -55,7 +55,7 @@ async function grantCredits() {
   }
 
   try {
-    const { user, credit } = (await loadSchemaTables()) as any;
+    const { user, credit, creditBalance } = (await loadSchemaTables()) as any;
     const sqlEq: any = eq;
 
     // Find user
@@ -140,6 +140,11 @@ async function grantCredits() {
 
     await db().insert(credit).values(newCredit);
 
+    // drop the materialized balance, it is recomputed on the next read
+    await db()
+      .delete(creditBalance)
+      .where(eq(creditBalance.userId, targetUser.id));
+
     console.log(`\n✅ Successfully granted credits!`);
     console.log(`\n📊 Summary:`);
     console.log(`   User: ${targetUser.name || targetUser.email} (${targetUser.email})`);
@@ -0,0 +1,38 @@
+/**
+ * Reconcile Credit Balances Script
+ *
+ * This script recomputes the materialized credit balance of every user
+ * from their grant records. Run it periodically (e.g. daily cron) to
+ * correct any drift and apply expired grants.
+ *
+ * Usage:
+ *   npx tsx scripts/reconcile-credits.ts
+ *   npx tsx scripts/reconcile-credits.ts --batch-size=200
+ */
+
+import { reconcileCreditBalances } from '@/shared/models/credit';
+
+async function reconcileCredits() {
+  const args = process.argv.slice(2);
+  const batchSizeArg = args.find((arg) => arg.startsWith('--batch-size='));
+  const batchSize = batchSizeArg
+    ? parseInt(batchSizeArg.split('=')[1]) || undefined
+    : undefined;
+
+  console.log(`\n🔄 Reconciling credit balances...`);
+
+  const startTime = Date.now();
+  const reconciled = await reconcileCreditBalances({ batchSize });
+
+  console.log(
+    `\n✅ Reconciled ${reconciled} users in ${((Date.now() - startTime) / 1000).toFixed(1)}s`
+  );
+}
+
+// Run the script
+reconcileCredits()
+  .then(() => process.exit(0))
+  .catch((error) => {
+    console.error('\n❌ Error reconciling credits:', error);
+    process.exit(1);
+  });
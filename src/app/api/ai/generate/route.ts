@@ -6,6 +6,7 @@ import { createAITask, NewAITask } from '@/shared/models/ai_task';
 import { getRemainingCredits } from '@/shared/models/credit';
 import { getUserInfo } from '@/shared/models/user';
 import { getAIService } from '@/shared/services/ai';
+import { trackProviderCall } from '@/shared/services/provider_router';
 
 export async function POST(request: Request) {
   try {
@@ -87,7 +88,9 @@ export async function POST(request: Request) {
     };
 
     // generate content
-    const result = await aiProvider.generate({ params });
+    const result = await trackProviderCall(provider, model, () =>
+      aiProvider.generate({ params })
+    );
     if (!result?.taskId) {
       throw new Error(
         `ai generate failed, mediaType: ${mediaType}, provider: ${provider}, model: ${model}`
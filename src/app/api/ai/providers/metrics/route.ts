@@ -0,0 +1,24 @@
+import { PERMISSIONS } from '@/core/rbac';
+import { respData, respErr } from '@/shared/lib/resp';
+import { getUserInfo } from '@/shared/models/user';
+import { getProviderMetrics } from '@/shared/services/provider_router';
+import { hasPermission } from '@/shared/services/rbac';
+
+export async function GET() {
+  try {
+    const user = await getUserInfo();
+    if (!user) {
+      return respErr('no auth, please sign in');
+    }
+
+    if (!(await hasPermission(user.id, PERMISSIONS.AITASKS_READ))) {
+      return respErr('no permission');
+    }
+
+    // rolling stats of this server instance
+    return respData({ providers: getProviderMetrics() });
+  } catch (e) {
+    console.log('get provider metrics failed:', e);
+    return respErr('get provider metrics failed');
+  }
+}
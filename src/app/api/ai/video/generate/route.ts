@@ -1,9 +1,24 @@
+import { envConfigs } from '@/config';
 import { AIMediaType, AITaskStatus } from '@/extensions/ai';
 import { getUuid } from '@/shared/lib/hash';
-import { createAITask, NewAITask } from '@/shared/models/ai_task';
+import {
+  AITask,
+  attachAITaskProviderTask,
+  createAITask,
+  failAITaskReservation,
+  findAITaskByIdempotencyKey,
+  isStaleAITaskReservation,
+  NewAITask,
+} from '@/shared/models/ai_task';
+import { ANONYMOUS_USAGE_EXCEEDED } from '@/shared/models/anonymous';
 import { getRemainingCredits } from '@/shared/models/credit';
 import { getUserInfo } from '@/shared/models/user';
 import { respData, respErr } from '@/shared/lib/resp';
+import {
+  ProviderCandidate,
+  rankProviders,
+  routeProviders,
+} from '@/shared/services/provider_router';
 
 import { evolinkAPI } from '@/extensions/ai/evolink';
 import { replicateAPI } from '@/extensions/ai/replicate';
@@ -13,6 +28,45 @@ const buildErrorMessage = (error: unknown) => {
   return String(error);
 };
 
+// Webhook url feeding the shared task status cache, only for public app urls
+const getVideoCallbackUrl = (provider: string): string | undefined => {
+  const appUrl = envConfigs.app_url;
+  if (
+    !appUrl.startsWith('http') ||
+    appUrl.includes('localhost') ||
+    appUrl.includes('127.0.0.1')
+  ) {
+    return undefined;
+  }
+  return `${appUrl.replace(/\/$/, '')}/api/ai/video/notify/${provider}`;
+};
+
+// Client supplied idempotency key, from the header or the request body
+const getIdempotencyKey = (request: Request, body: any): string | null => {
+  const value =
+    request.headers.get('idempotency-key') || body?.idempotencyKey || '';
+  const key = String(value).trim();
+  return key ? key.slice(0, 191) : null;
+};
+
+// Same response as the original request, for retries with the same key
+const replayTask = async (task: AITask, isFreeUsage: boolean) => {
+  if (!task.taskId) {
+    return respErr('A request with this idempotency key is still in progress');
+  }
+
+  return respData({
+    success: true,
+    provider: task.provider,
+    taskId: task.taskId,
+    status: task.status,
+    costCredits: task.costCredits,
+    remainingCredits: isFreeUsage ? 0 : await getRemainingCredits(task.userId),
+    isFreeUsage,
+    replayed: true,
+  });
+};
+
 // Video generation cost credits based on type and duration
 const getVideoCostCredits = (
   type: string,
@@ -59,137 +113,146 @@ export async function POST(request: Request) {
     // Get current user
     const user = await getUserInfo();
 
-    // ========== ANONYMOUS FREE USAGE CHECK ==========
-    let isFreeUsage = false;
-    if (!user && anonymousId) {
-      // Check if anonymous user has used free generation
-      const { checkAnonymousUsage } = await import('@/shared/models/anonymous');
-      const hasUsedFree = await checkAnonymousUsage(anonymousId);
-
-      if (!hasUsedFree) {
-        isFreeUsage = true;
-      } else {
-        return respErr('FREE_USAGE_EXCEEDED: You have used your free video generation. Please sign in to continue generating videos.');
-      }
-    } else if (!user) {
+    // Anonymous users get one free generation, claimed with the task below
+    const isFreeUsage = !user && !!anonymousId;
+    if (!user && !anonymousId) {
       return respErr('Please sign in to generate videos');
     }
 
-    // ========== CREDITS CHECK ==========
+    // For anonymous users, use anonymousId as userId (prefixed with 'anon_')
+    const userId = isFreeUsage ? `anon_${anonymousId}` : (user?.id ?? 'unknown');
+
     // Calculate cost credits
-    const costCredits = getVideoCostCredits(type, duration);
-
-    let remainingCredits = 0;
-    // Skip credit check for free anonymous usage
-    if (!isFreeUsage && user) {
-      // Check if user has enough credits
-      remainingCredits = await getRemainingCredits(user.id);
-      if (remainingCredits < costCredits) {
-        return respErr(`insufficient credits, required: ${costCredits}, remaining: ${remainingCredits}`);
+    const costCredits = isFreeUsage ? 0 : getVideoCostCredits(type, duration);
+
+    // ========== IDEMPOTENCY CHECK ==========
+    // Double clicks and client retries with the same key get the same task
+    const idempotencyKey = getIdempotencyKey(request, body);
+    if (idempotencyKey) {
+      const existingTask = await findAITaskByIdempotencyKey({
+        userId,
+        idempotencyKey,
+      });
+      if (existingTask && isStaleAITaskReservation(existingTask)) {
+        // the original request died before reaching a provider,
+        // refund it and let this retry create the task again
+        await failAITaskReservation(existingTask, {
+          errorMessage: 'reservation expired before the provider task was created',
+        });
+      } else if (existingTask) {
+        return replayTask(existingTask, isFreeUsage);
       }
     }
 
-    // ========== VIDEO GENERATION ==========
-    const errors: string[] = [];
-    let result:
-      | { taskId: string; taskStatus: AITaskStatus; provider: string }
-      | undefined;
+    // ========== VIDEO PROVIDERS ==========
+    type VideoTaskResult = { taskId: string; taskStatus: AITaskStatus };
+    const candidates: ProviderCandidate<VideoTaskResult>[] = [];
 
-    // Try Replicate first
     if (process.env.REPLICATE_API_TOKEN) {
-      try {
-        const apiResult =
+      candidates.push({
+        provider: 'replicate',
+        model:
           type === 'text-to-video'
-            ? await replicateAPI.textToVideo({
-                prompt,
-                aspectRatio: aspectRatio as '16:9' | '9:16' | '1:1',
-                duration,
-              })
-            : await replicateAPI.imageToVideo({
-                prompt: prompt || 'Animate this image',
-                imageUrl,
-                duration,
-              });
-
-        result = {
-          taskId: apiResult.taskId,
-          taskStatus: apiResult.taskStatus,
-          provider: 'replicate',
-        };
-      } catch (error) {
-        errors.push(`replicate: ${buildErrorMessage(error)}`);
-      }
+            ? 'wan-video/wan-2.5-t2v'
+            : 'wan-video/wan-2.5-i2v',
+        run: async () => {
+          const apiResult =
+            type === 'text-to-video'
+              ? await replicateAPI.textToVideo({
+                  prompt,
+                  aspectRatio: aspectRatio as '16:9' | '9:16' | '1:1',
+                  duration,
+                  callbackUrl: getVideoCallbackUrl('replicate'),
+                })
+              : await replicateAPI.imageToVideo({
+                  prompt: prompt || 'Animate this image',
+                  imageUrl,
+                  duration,
+                  callbackUrl: getVideoCallbackUrl('replicate'),
+                });
+
+          return {
+            taskId: apiResult.taskId,
+            taskStatus: apiResult.taskStatus,
+          };
+        },
+        cancel: (task) => replicateAPI.cancelPrediction(task.taskId),
+      });
     }
 
-    // Fallback to Evolink
-    if (!result && process.env.EVOLINK_API_KEY) {
-      try {
-        const apiResult =
+    if (process.env.EVOLINK_API_KEY) {
+      const evolinkCallbackUrl = callbackUrl || getVideoCallbackUrl('evolink');
+      candidates.push({
+        provider: 'evolink',
+        model:
           type === 'text-to-video'
-            ? await evolinkAPI.textToVideo({
-                prompt,
-                aspectRatio,
-                quality,
-                duration,
-                promptExtend,
-                shotType,
-                audioUrl,
-                callbackUrl,
-              })
-            : await evolinkAPI.imageToVideo({
-                imageUrl,
-                prompt,
-                aspectRatio,
-                quality,
-                duration,
-                promptExtend,
-                shotType,
-                audioUrl,
-                callbackUrl,
-              });
-
-        if (
-          apiResult.status === 'failed' ||
-          apiResult.status === 'cancelled'
-        ) {
-          let failureDetail = '';
-          try {
-            const statusResult = await evolinkAPI.getTaskStatus(apiResult.id);
-            const errorMessage =
-              statusResult.error?.message || statusResult.error?.code || '';
-            if (errorMessage) failureDetail = `: ${errorMessage}`;
-          } catch {
-            // Ignore status fetch failures; use a generic message.
+            ? 'wan2.6-text-to-video'
+            : 'wan2.6-image-to-video',
+        run: async () => {
+          const apiResult =
+            type === 'text-to-video'
+              ? await evolinkAPI.textToVideo({
+                  prompt,
+                  aspectRatio,
+                  quality,
+                  duration,
+                  promptExtend,
+                  shotType,
+                  audioUrl,
+                  callbackUrl: evolinkCallbackUrl,
+                })
+              : await evolinkAPI.imageToVideo({
+                  imageUrl,
+                  prompt,
+                  aspectRatio,
+                  quality,
+                  duration,
+                  promptExtend,
+                  shotType,
+                  audioUrl,
+                  callbackUrl: evolinkCallbackUrl,
+                });
+
+          if (
+            apiResult.status === 'failed' ||
+            apiResult.status === 'cancelled'
+          ) {
+            let failureDetail = '';
+            try {
+              const statusResult = await evolinkAPI.getTaskStatus(apiResult.id);
+              const errorMessage =
+                statusResult.error?.message || statusResult.error?.code || '';
+              if (errorMessage) failureDetail = `: ${errorMessage}`;
+            } catch {
+              // Ignore status fetch failures; use a generic message.
+            }
+            throw new Error(`Evolink task failed on create${failureDetail}`);
           }
-          throw new Error(`Evolink task failed on create${failureDetail}`);
-        }
 
-        result = {
-          taskId: apiResult.id,
-          taskStatus: apiResult.status as AITaskStatus,
-          provider: 'evolink',
-        };
-      } catch (error) {
-        errors.push(`evolink: ${buildErrorMessage(error)}`);
-      }
+          return {
+            taskId: apiResult.id,
+            taskStatus: apiResult.status as AITaskStatus,
+          };
+        },
+        cancel: (task) => evolinkAPI.cancelTask(task.taskId),
+      });
     }
 
-    // No provider succeeded
-    if (!result) {
+    if (candidates.length === 0) {
       return respErr(
-        `No available provider could create the task: ${errors.join(' | ') || 'Missing API keys for video providers'}`
+        'No available provider could create the task: Missing API keys for video providers'
       );
     }
 
     // ========== CREATE AI TASK AND DEDUCT CREDITS ==========
-    // For anonymous users, use anonymousId as userId (prefixed with 'anon_')
-    const userId = isFreeUsage ? `anon_${anonymousId}` : (user?.id ?? 'unknown');
-
+    // One transaction: claim free usage or debit credits, then insert the task.
+    // The task is reserved before the provider call so concurrent retries
+    // conflict on the idempotency key instead of creating a second paid task.
     const newAITask: NewAITask = {
       id: getUuid(),
       userId,
       mediaType: AIMediaType.VIDEO,
-      provider: result.provider,
+      provider: rankProviders(candidates)[0].provider,
       model: type === 'text-to-video' ? 'wan-2.5-t2v' : 'wan-2.5-i2v',
       prompt: prompt || (imageUrl ? `Image to video: ${imageUrl}` : ''),
       scene: type,
@@ -202,28 +265,86 @@ export async function POST(request: Request) {
         audioUrl,
         imageUrl,
       }),
-      status: result.taskStatus,
-      costCredits: isFreeUsage ? 0 : costCredits,
-      taskId: result.taskId,
+      status: AITaskStatus.PENDING,
+      costCredits,
+      taskId: null,
       taskInfo: null,
       taskResult: null,
+      idempotencyKey,
     };
 
-    await createAITask(newAITask);
+    let aiTaskRecord: AITask;
+    try {
+      aiTaskRecord = await createAITask(newAITask, {
+        anonymousId: isFreeUsage ? anonymousId : undefined,
+      });
+    } catch (error) {
+      const message = buildErrorMessage(error);
+      if (message === ANONYMOUS_USAGE_EXCEEDED) {
+        return respErr('FREE_USAGE_EXCEEDED: You have used your free video generation. Please sign in to continue generating videos.');
+      }
+      if (message.startsWith('Insufficient credits')) {
+        const remainingCredits = await getRemainingCredits(userId);
+        return respErr(`insufficient credits, required: ${costCredits}, remaining: ${remainingCredits}`);
+      }
+      if (idempotencyKey) {
+        // lost the race against a concurrent request with the same key
+        const existingTask = await findAITaskByIdempotencyKey({
+          userId,
+          idempotencyKey,
+        });
+        if (existingTask) {
+          return replayTask(existingTask, isFreeUsage);
+        }
+      }
+      throw error;
+    }
+
+    // ========== VIDEO GENERATION ==========
+    // Healthiest provider first, optionally hedged with the next one
+    let result: VideoTaskResult & { provider: string };
+    try {
+      const routed = await routeProviders(candidates, {
+        hedge: process.env.VIDEO_HEDGE_ENABLED === 'true',
+      });
+      result = { ...routed.result, provider: routed.provider };
+    } catch (error) {
+      // refund credits and free the key so the client can retry
+      await failAITaskReservation(aiTaskRecord, {
+        errorMessage: buildErrorMessage(error),
+      });
+      return respErr(
+        `No available provider could create the task: ${buildErrorMessage(error)}`
+      );
+    }
 
-    // Record anonymous usage if this was a free generation
-    if (isFreeUsage && anonymousId) {
-      const { recordAnonymousUsage } = await import('@/shared/models/anonymous');
-      await recordAnonymousUsage(anonymousId);
+    const attached = await attachAITaskProviderTask(aiTaskRecord.id, {
+      provider: result.provider,
+      status: result.taskStatus,
+      taskId: result.taskId,
+    });
+    if (!attached) {
+      // the reservation expired and was refunded while the provider was slow
+      await candidates
+        .find((candidate) => candidate.provider === result.provider)
+        ?.cancel?.(result)
+        .catch((e) => console.log('cancel expired video task failed:', e));
+      return respErr(
+        'Video generation took too long to start, your credits were refunded. Please try again.'
+      );
     }
 
+    const remainingCredits = isFreeUsage
+      ? 0
+      : await getRemainingCredits(userId);
+
     return respData({
       success: true,
       provider: result.provider,
       taskId: result.taskId,
       status: result.taskStatus,
-      costCredits: isFreeUsage ? 0 : costCredits,
-      remainingCredits: isFreeUsage ? 0 : remainingCredits - costCredits,
+      costCredits,
+      remainingCredits,
       isFreeUsage,
     });
   } catch (error: any) {
@@ -0,0 +1,47 @@
+import {
+  getVideoTaskStatus,
+  isSupportedVideoTaskProvider,
+} from '@/shared/services/video_task';
+
+/**
+ * POST /api/ai/video/notify/:provider
+ * Provider webhook (callbackUrl) for video generation tasks.
+ *
+ * The payload is only used to identify the task: its status is re-read from
+ * the provider, so a forged callback can't mark a task as finished.
+ */
+export async function POST(
+  req: Request,
+  { params }: { params: Promise<{ provider: string }> }
+) {
+  try {
+    const { provider } = await params;
+
+    if (!isSupportedVideoTaskProvider(provider)) {
+      throw new Error('invalid video provider');
+    }
+
+    const body = await req.json();
+    const taskId = body?.id || body?.task_id || body?.taskId;
+    if (!taskId || typeof taskId !== 'string') {
+      throw new Error('task id not found');
+    }
+
+    // refresh the shared status cache, subscribers get the update pushed
+    await getVideoTaskStatus(provider, taskId, { force: true });
+
+    return Response.json({
+      message: 'success',
+    });
+  } catch (err: any) {
+    console.log('handle video notify failed', err);
+    return Response.json(
+      {
+        message: `handle video notify failed: ${err.message}`,
+      },
+      {
+        status: 500,
+      }
+    );
+  }
+}
@@ -0,0 +1,112 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+import {
+  getVideoTaskStatus,
+  isSupportedVideoTaskProvider,
+  isTerminalVideoTaskStatus,
+  subscribeVideoTaskStatus,
+  VideoTaskStatus,
+} from '@/shared/services/video_task';
+
+export const dynamic = 'force-dynamic';
+
+// keep intermediaries from closing an idle stream
+const HEARTBEAT_INTERVAL_MS = 15000;
+
+/**
+ * GET /api/ai/video/status/stream?taskId=xxx&provider=xxx
+ * Push task status updates with Server-Sent Events until the task finishes.
+ */
+export async function GET(request: NextRequest) {
+  const searchParams = request.nextUrl.searchParams;
+  const taskId = searchParams.get('taskId');
+  const provider = searchParams.get('provider');
+
+  if (!taskId || !provider) {
+    return NextResponse.json(
+      { success: false, error: 'Missing required parameters: taskId, provider' },
+      { status: 400 }
+    );
+  }
+
+  if (!isSupportedVideoTaskProvider(provider)) {
+    return NextResponse.json(
+      { success: false, error: `Unsupported provider: ${provider}` },
+      { status: 400 }
+    );
+  }
+
+  const encoder = new TextEncoder();
+  let cleanup = () => {};
+
+  const stream = new ReadableStream({
+    start(controller) {
+      let closed = false;
+      let unsubscribe = () => {};
+
+      const heartbeat = setInterval(() => {
+        if (!closed) controller.enqueue(encoder.encode(': ping\n\n'));
+      }, HEARTBEAT_INTERVAL_MS);
+
+      cleanup = () => {
+        if (closed) return;
+        closed = true;
+        clearInterval(heartbeat);
+        unsubscribe();
+        try {
+          controller.close();
+        } catch {
+          // stream already closed by the client
+        }
+      };
+
+      const send = (event: string, data: any) => {
+        if (closed) return;
+        controller.enqueue(
+          encoder.encode(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`)
+        );
+      };
+
+      const onStatus = ({ updatedAt, ...status }: VideoTaskStatus) => {
+        send('status', { success: true, ...status });
+        if (isTerminalVideoTaskStatus(status.status)) {
+          cleanup();
+        }
+      };
+
+      request.signal.addEventListener('abort', () => cleanup());
+
+      // warm the cache first so the subscriber gets a status right away
+      getVideoTaskStatus(provider, taskId)
+        .catch((e) => {
+          send('error', {
+            success: false,
+            error: 'Failed to get task status',
+            details: e instanceof Error ? e.message : String(e),
+          });
+        })
+        .finally(() => {
+          if (!closed) {
+            unsubscribe = subscribeVideoTaskStatus(provider, taskId, onStatus);
+            // a cached terminal status is delivered during subscribe and
+            // closes the stream before unsubscribe was assigned
+            if (closed) {
+              unsubscribe();
+            }
+          }
+        });
+    },
+    cancel() {
+      cleanup();
+    },
+  });
+
+  return new Response(stream, {
+    headers: {
+      'content-type': 'text/event-stream',
+      'cache-control': 'no-cache, no-transform',
+      connection: 'keep-alive',
+      'x-accel-buffering': 'no',
+    },
+  });
+}
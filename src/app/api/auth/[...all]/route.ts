@@ -1,8 +1,10 @@
+import { getSessionCookie } from 'better-auth/cookies';
 import { toNextJsHandler } from 'better-auth/next-js';
 
 import { getAuth } from '@/core/auth';
 import { isCloudflareWorker } from '@/shared/lib/env';
 import { enforceMinIntervalRateLimit } from '@/shared/lib/rate-limit';
+import { invalidateSessionCache } from '@/shared/models/user';
 
 function maybeRateLimitGetSession(request: Request): Response | null {
   const url = new URL(request.url);
@@ -30,7 +32,12 @@ export async function POST(request: Request) {
 
   const auth = await getAuth();
   const handler = toNextJsHandler(auth.handler);
-  return handler.POST(request);
+  const response = await handler.POST(request);
+
+  // sign out, password and session changes must not be served from cache
+  invalidateSessionCache({ token: getSessionCookie(request) });
+
+  return response;
 }
 
 export async function GET(request: Request) {
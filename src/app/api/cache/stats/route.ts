@@ -0,0 +1,24 @@
+import { PERMISSIONS } from '@/core/rbac';
+import { getLruCacheStats } from '@/shared/lib/lru-cache';
+import { respData, respErr } from '@/shared/lib/resp';
+import { getUserInfo } from '@/shared/models/user';
+import { hasPermission } from '@/shared/services/rbac';
+
+export async function GET() {
+  try {
+    const user = await getUserInfo();
+    if (!user) {
+      return respErr('no auth, please sign in');
+    }
+
+    if (!(await hasPermission(user.id, PERMISSIONS.ADMIN_ACCESS))) {
+      return respErr('no permission');
+    }
+
+    // hit/miss counters of this server instance
+    return respData({ caches: getLruCacheStats() });
+  } catch (e) {
+    console.log('get cache stats failed:', e);
+    return respErr('get cache stats failed');
+  }
+}
@@ -1,5 +1,52 @@
 import { NextRequest, NextResponse } from 'next/server';
 
+import {
+  getMediaCacheEntry,
+  isMediaCacheable,
+  isMediaCacheEnabled,
+  MediaCacheEntry,
+  openMediaCacheStream,
+  putMediaCacheEntry,
+} from '@/shared/lib/media-cache';
+import { Configs, createConfigsMemo } from '@/shared/models/config';
+
+// request headers forwarded to the upstream
+const FORWARD_REQUEST_HEADERS = [
+  'range',
+  'if-range',
+  'if-none-match',
+  'if-modified-since',
+];
+
+// response headers passed back to the client
+const PASS_RESPONSE_HEADERS = [
+  'content-type',
+  'content-length',
+  'content-range',
+  'accept-ranges',
+  'etag',
+  'last-modified',
+  'cache-control',
+];
+
+// how long a resolved evolink file id stays valid (download urls may be signed)
+const FILE_ID_TTL_MS = 10 * 60 * 1000;
+const MAX_FILE_IDS = 1000;
+
+type FileIdStore = Map<string, { url: string; expiresAt: number }>;
+
+declare global {
+  // eslint-disable-next-line no-var
+  var __proxyFileIdStore: FileIdStore | undefined;
+}
+
+function getFileIdStore(): FileIdStore {
+  if (!globalThis.__proxyFileIdStore) {
+    globalThis.__proxyFileIdStore = new Map();
+  }
+  return globalThis.__proxyFileIdStore;
+}
+
 const isHttpUrl = (value: string) => {
   try {
     const parsed = new URL(value);
@@ -42,6 +89,220 @@ const extractUrlDeep = (value: any, visited = new Set<any>()): string | null =>
   return null;
 };
 
+const evolinkBase = process.env.EVOLINK_API_BASE_URL || '';
+const evolinkKey = process.env.EVOLINK_API_KEY || '';
+const evolinkHost = isHttpUrl(evolinkBase) ? new URL(evolinkBase).host : '';
+
+const fetchWithAuth = async (
+  target: string,
+  extraHeaders: Record<string, string> = {}
+) => {
+  const headers: Record<string, string> = { ...extraHeaders };
+  if (evolinkKey && evolinkHost && new URL(target).host === evolinkHost) {
+    headers.Authorization = `Bearer ${evolinkKey}`;
+  }
+  return fetch(target, { headers });
+};
+
+const hostOf = (value?: string) => {
+  if (!value) return '';
+  try {
+    return new URL(isHttpUrl(value) ? value : `https://${value}`).host;
+  } catch {
+    return '';
+  }
+};
+
+// extra trusted media hosts, comma separated
+const extraCacheHosts = (process.env.MEDIA_CACHE_HOSTS || '')
+  .split(',')
+  .map((host) => host.trim())
+  .filter(Boolean);
+
+/**
+ * hosts whose responses may be written to the media cache: evolink and our
+ * storage domains. anything else is proxied but never cached, so arbitrary
+ * urls can't fill the cache and evict real entries.
+ */
+const getCacheableHosts = createConfigsMemo((configs: Configs) => {
+  const hosts = [
+    evolinkHost,
+    ...extraCacheHosts,
+    hostOf(configs.r2_domain),
+    hostOf(configs.r2_endpoint),
+    configs.r2_account_id
+      ? `${configs.r2_account_id}.r2.cloudflarestorage.com`
+      : '',
+    hostOf(configs.s3_domain),
+    hostOf(configs.s3_endpoint),
+  ];
+  return new Set(hosts.filter(Boolean));
+});
+
+async function isCacheableTarget(target: string) {
+  return (await getCacheableHosts()).has(new URL(target).host);
+}
+
+/**
+ * resolve an evolink file id to a downloadable url, probing candidates once per file
+ */
+async function resolveFileId(fileId: string): Promise<string | null> {
+  const store = getFileIdStore();
+  const cached = store.get(fileId);
+  if (cached && cached.expiresAt > Date.now()) {
+    return cached.url;
+  }
+
+  const candidates = [
+    `${evolinkBase}/files/${fileId}`,
+    `${evolinkBase}/files/${fileId}/download`,
+  ];
+
+  for (const candidate of candidates) {
+    const candidateResponse = await fetchWithAuth(candidate);
+    if (!candidateResponse.ok) {
+      await candidateResponse.body?.cancel();
+      continue;
+    }
+
+    let resolved: string | null = candidate;
+    const contentType = candidateResponse.headers.get('content-type') || '';
+    if (contentType.includes('application/json')) {
+      resolved = extractUrlDeep(await candidateResponse.json());
+    } else {
+      // the candidate serves the file itself, only the headers were needed
+      await candidateResponse.body?.cancel();
+    }
+
+    if (!resolved) {
+      continue;
+    }
+
+    if (store.size >= MAX_FILE_IDS) {
+      const oldest = store.keys().next().value;
+      if (oldest !== undefined) store.delete(oldest);
+    }
+    store.set(fileId, { url: resolved, expiresAt: Date.now() + FILE_ID_TTL_MS });
+    return resolved;
+  }
+
+  return null;
+}
+
+/**
+ * parse a single `bytes=` range, returns null for an absent or multi range
+ */
+function parseRange(
+  header: string | null,
+  size: number
+): { start: number; end: number } | 'invalid' | null {
+  if (!header) return null;
+  const match = /^bytes=(\d*)-(\d*)$/.exec(header.trim());
+  if (!match) return null;
+
+  const [, startStr, endStr] = match;
+  let start: number;
+  let end: number;
+
+  if (!startStr) {
+    // suffix range: last n bytes
+    const suffix = Number(endStr);
+    if (!suffix) return 'invalid';
+    start = Math.max(0, size - suffix);
+    end = size - 1;
+  } else {
+    start = Number(startStr);
+    end = endStr ? Math.min(Number(endStr), size - 1) : size - 1;
+  }
+
+  if (start > end || start >= size) return 'invalid';
+  return { start, end };
+}
+
+function isNotModified(req: NextRequest, entry: MediaCacheEntry) {
+  const ifNoneMatch = req.headers.get('if-none-match');
+  if (ifNoneMatch && entry.etag) {
+    return (
+      ifNoneMatch === '*' ||
+      ifNoneMatch.split(',').some((tag) => tag.trim() === entry.etag)
+    );
+  }
+
+  const ifModifiedSince = req.headers.get('if-modified-since');
+  if (!ifNoneMatch && ifModifiedSince && entry.lastModified) {
+    return Date.parse(entry.lastModified) <= Date.parse(ifModifiedSince);
+  }
+
+  return false;
+}
+
+function serveFromCache(req: NextRequest, entry: MediaCacheEntry) {
+  const headers = new Headers({
+    'Content-Type': entry.contentType,
+    'Accept-Ranges': 'bytes',
+    'Cache-Control': 'private, max-age=3600',
+  });
+  if (entry.etag) headers.set('ETag', entry.etag);
+  if (entry.lastModified) headers.set('Last-Modified', entry.lastModified);
+
+  if (isNotModified(req, entry)) {
+    return new NextResponse(null, { status: 304, headers });
+  }
+
+  // a stale If-Range means the client wants the whole (new) object
+  const ifRange = req.headers.get('if-range');
+  const rangeHeader =
+    ifRange && ifRange !== entry.etag && ifRange !== entry.lastModified
+      ? null
+      : req.headers.get('range');
+
+  const range = parseRange(rangeHeader, entry.size);
+  if (range === 'invalid') {
+    headers.set('Content-Range', `bytes */${entry.size}`);
+    return new NextResponse(null, { status: 416, headers });
+  }
+
+  if (range) {
+    headers.set('Content-Range', `bytes ${range.start}-${range.end}/${entry.size}`);
+    headers.set('Content-Length', String(range.end - range.start + 1));
+    return new NextResponse(openMediaCacheStream(entry, range), {
+      status: 206,
+      headers,
+    });
+  }
+
+  headers.set('Content-Length', String(entry.size));
+  return new NextResponse(openMediaCacheStream(entry), { headers });
+}
+
+/**
+ * fetch the full object in the background so later requests hit the cache
+ */
+const warmingTargets = new Set<string>();
+
+function warmCache(target: string, size: number) {
+  if (!isMediaCacheable(size) || warmingTargets.has(target)) return;
+  warmingTargets.add(target);
+
+  fetchWithAuth(target)
+    .then((response) => {
+      if (response.status !== 200 || !response.body) {
+        return response.body?.cancel();
+      }
+      return putMediaCacheEntry({
+        key: target,
+        body: response.body,
+        size: Number(response.headers.get('content-length')) || size,
+        contentType:
+          response.headers.get('content-type') || 'application/octet-stream',
+        etag: response.headers.get('etag'),
+        lastModified: response.headers.get('last-modified'),
+      });
+    })
+    .catch((e) => console.log('warm media cache failed:', e))
+    .finally(() => warmingTargets.delete(target));
+}
+
 export async function GET(req: NextRequest) {
   const url = req.nextUrl.searchParams.get('url');
 
@@ -50,83 +311,74 @@ export async function GET(req: NextRequest) {
   }
 
   try {
-    const evolinkBase = process.env.EVOLINK_API_BASE_URL || '';
-    const evolinkKey = process.env.EVOLINK_API_KEY || '';
-    const evolinkHost = evolinkBase ? new URL(evolinkBase).host : '';
-
-    const fetchWithAuth = async (target: string) => {
-      const headers: Record<string, string> = {};
-      if (evolinkKey && evolinkHost && new URL(target).host === evolinkHost) {
-        headers.Authorization = `Bearer ${evolinkKey}`;
-      }
-      return fetch(target, { headers });
-    };
-
+    let target = url;
     if (!isHttpUrl(url)) {
       if (!evolinkBase || !evolinkKey) {
         return new NextResponse('Invalid url parameter', { status: 400 });
       }
 
-      const fileId = url.trim();
-      const candidates = [
-        `${evolinkBase}/files/${fileId}`,
-        `${evolinkBase}/files/${fileId}/download`,
-      ];
-
-      for (const candidate of candidates) {
-        const candidateResponse = await fetchWithAuth(candidate);
-        if (!candidateResponse.ok) {
-          continue;
-        }
-
-        const contentType =
-          candidateResponse.headers.get('content-type') ||
-          'application/octet-stream';
-
-        if (contentType.includes('application/json')) {
-          const data = await candidateResponse.json();
-          const resolved = extractUrlDeep(data);
-          if (!resolved) {
-            continue;
-          }
-          const resolvedResponse = await fetchWithAuth(resolved);
-          if (!resolvedResponse.ok) {
-            continue;
-          }
-          return new NextResponse(resolvedResponse.body, {
-            headers: {
-              'Content-Type':
-                resolvedResponse.headers.get('content-type') ||
-                'application/octet-stream',
-            },
-          });
-        }
-
-        return new NextResponse(candidateResponse.body, {
-          headers: {
-            'Content-Type': contentType,
-          },
-        });
+      const resolved = await resolveFileId(url.trim());
+      if (!resolved) {
+        return new NextResponse('Failed to resolve file id', { status: 404 });
       }
+      target = resolved;
+    }
 
-      return new NextResponse('Failed to resolve file id', { status: 404 });
+    const cached = await getMediaCacheEntry(target);
+    if (cached) {
+      return serveFromCache(req, cached);
     }
 
-    const response = await fetchWithAuth(url);
+    const forwardHeaders: Record<string, string> = {};
+    for (const name of FORWARD_REQUEST_HEADERS) {
+      const value = req.headers.get(name);
+      if (value) forwardHeaders[name] = value;
+    }
+
+    const response = await fetchWithAuth(target, forwardHeaders);
 
-    if (!response.ok) {
+    if (!response.ok && response.status !== 304) {
+      await response.body?.cancel();
+      if (target !== url) {
+        // resolved url may have expired, probe again next time
+        getFileIdStore().delete(url.trim());
+      }
       return new NextResponse(`Failed to fetch file: ${response.statusText}`, {
         status: response.status,
       });
     }
 
-    const contentType =
-      response.headers.get('content-type') || 'application/octet-stream';
+    const headers = new Headers();
+    for (const name of PASS_RESPONSE_HEADERS) {
+      const value = response.headers.get(name);
+      if (value) headers.set(name, value);
+    }
+    if (!headers.has('content-type')) {
+      headers.set('content-type', 'application/octet-stream');
+    }
+
+    const contentLength = Number(response.headers.get('content-length'));
+
+    // fill the cache with a separate fetch instead of tee(), which has no
+    // backpressure and would buffer everything the client has not read yet
+    if (
+      isMediaCacheEnabled &&
+      response.body &&
+      (target !== url || (await isCacheableTarget(target)))
+    ) {
+      if (response.status === 200) {
+        warmCache(target, contentLength);
+      } else if (response.status === 206) {
+        const total = Number(
+          response.headers.get('content-range')?.split('/')[1]
+        );
+        if (total) warmCache(target, total);
+      }
+    }
 
     return new NextResponse(response.body, {
-      headers: {
-        'Content-Type': contentType,
-      },
+      status: response.status,
+      headers,
     });
   } catch (error) {
     console.error('Proxy error:', error);
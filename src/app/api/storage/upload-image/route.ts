@@ -1,7 +1,31 @@
+import { createLimit } from '@/shared/lib/concurrency';
 import { md5 } from '@/shared/lib/hash';
+import { createLruCache } from '@/shared/lib/lru-cache';
 import { respData, respErr } from '@/shared/lib/resp';
 import { getStorageService } from '@/shared/services/storage';
 
+// per image size cap, matches the uploader's default maxSizeMB
+const MAX_IMAGE_BYTES =
+  Number(process.env.UPLOAD_IMAGE_MAX_BYTES) || 10 * 1024 * 1024;
+const MAX_FILES = 10;
+// images hashed and uploaded at the same time per request
+const UPLOAD_CONCURRENCY = 3;
+
+// content keys known to exist in storage, saves a HEAD request per re-upload
+const storedKeys = createLruCache<string>('upload-image-keys', {
+  maxEntries: 2000,
+  ttlMs: 10 * 60 * 1000,
+});
+
+// uploads in flight by content key, the same image uploaded twice at once is stored once
+const pendingUploads = new Map<string, Promise<UploadResult>>();
+
+interface UploadResult {
+  url: string;
+  key: string;
+  deduped: boolean;
+}
+
 const extFromMime = (mimeType: string) => {
   const map: Record<string, string> = {
     'image/jpeg': 'jpg',
@@ -17,83 +41,99 @@ const extFromMime = (mimeType: string) => {
   return map[mimeType] || '';
 };
 
+async function storeImage(
+  storageService: Awaited<ReturnType<typeof getStorageService>>,
+  key: string,
+  body: Uint8Array,
+  contentType: string
+): Promise<UploadResult> {
+  const cachedUrl = storedKeys.get(key);
+  if (cachedUrl) {
+    return { url: cachedUrl, key, deduped: true };
+  }
+
+  // If the same image already exists, reuse its URL to save storage space.
+  // (Still depends on provider supporting signed HEAD + public url generation.)
+  const publicUrl = storageService.getPublicUrl({ key });
+  if (publicUrl && (await storageService.exists({ key }))) {
+    storedKeys.set(key, publicUrl);
+    return { url: publicUrl, key, deduped: true };
+  }
+
+  // Upload to storage
+  const result = await storageService.uploadFile({
+    body,
+    key,
+    contentType,
+    disposition: 'inline',
+  });
+
+  if (!result.success || !result.url) {
+    throw new Error(result.error || 'Upload failed');
+  }
+
+  storedKeys.set(key, result.url);
+  return { url: result.url, key: result.key || key, deduped: false };
+}
+
 export async function POST(req: Request) {
   try {
+    // reject oversized requests before buffering the form data
+    const contentLength = Number(req.headers.get('content-length'));
+    if (contentLength > MAX_IMAGE_BYTES * MAX_FILES) {
+      return respErr('Upload too large');
+    }
+
     const formData = await req.formData();
     const files = formData.getAll('files') as File[];
 
-    console.log('[API] Received files:', files.length);
-    files.forEach((file, i) => {
-      console.log(`[API] File ${i}:`, {
-        name: file.name,
-        type: file.type,
-        size: file.size,
-      });
-    });
-
     if (!files || files.length === 0) {
       return respErr('No files provided');
     }
 
-    const storageService = await getStorageService();
-    const uploadResults = [];
+    if (files.length > MAX_FILES) {
+      return respErr(`Too many files, max ${MAX_FILES}`);
+    }
 
+    // Validate all files before uploading any of them
     for (const file of files) {
-      // Validate file type
       if (!file.type.startsWith('image/')) {
         return respErr(`File ${file.name} is not an image`);
       }
-
-      // Convert file to buffer
-      const arrayBuffer = await file.arrayBuffer();
-      const body = new Uint8Array(arrayBuffer);
-
-      const digest = md5(body);
-      const ext = extFromMime(file.type) || file.name.split('.').pop() || 'bin';
-      const key = `${digest}.${ext}`;
-
-      // If the same image already exists, reuse its URL to save storage space.
-      // (Still depends on provider supporting signed HEAD + public url generation.)
-      const exists = await storageService.exists({ key });
-      if (exists) {
-        const publicUrl = storageService.getPublicUrl({ key });
-        if (publicUrl) {
-          uploadResults.push({
-            url: publicUrl,
-            key,
-            filename: file.name,
-            deduped: true,
-          });
-          continue;
-        }
+      if (file.size > MAX_IMAGE_BYTES) {
+        return respErr(
+          `File ${file.name} is too large, max ${Math.floor(MAX_IMAGE_BYTES / 1024 / 1024)}MB`
+        );
       }
+    }
 
-      // Upload to storage
-      const result = await storageService.uploadFile({
-        body,
-        key: key,
-        contentType: file.type,
-        disposition: 'inline',
-      });
-
-      if (!result.success) {
-        console.error('[API] Upload failed:', result.error);
-        return respErr(result.error || 'Upload failed');
-      }
+    const storageService = await getStorageService();
+    const limit = createLimit(UPLOAD_CONCURRENCY);
 
-      console.log('[API] Upload success:', result.url);
+    const uploadResults = await Promise.all(
+      files.map((file) =>
+        limit(async () => {
+          // content addressed key, identical images share one object.
+          // req.formData() has already buffered the whole request, so the
+          // image is read once and the same bytes are hashed and uploaded
+          // rather than streamed to storage.
+          const body = new Uint8Array(await file.arrayBuffer());
+          const ext =
+            extFromMime(file.type) || file.name.split('.').pop() || 'bin';
+          const key = `${md5(body)}.${ext}`;
 
-      uploadResults.push({
-        url: result.url,
-        key: result.key,
-        filename: file.name,
-        deduped: false,
-      });
-    }
+          let pending = pendingUploads.get(key);
+          if (!pending) {
+            pending = storeImage(storageService, key, body, file.type).finally(
+              () => pendingUploads.delete(key)
+            );
+            pendingUploads.set(key, pending);
+          }
 
-    console.log(
-      '[API] All uploads complete. Returning URLs:',
-      uploadResults.map((r) => r.url)
+          const result = await pending;
+          return { ...result, filename: file.name };
+        })
+      )
     );
 
     return respData({
@@ -6,6 +6,7 @@ import {
   mysqlTable,
   text,
   timestamp,
+  uniqueIndex,
   varchar,
 } from 'drizzle-orm/mysql-core';
 
@@ -331,6 +332,16 @@ export const credit = table(
   ]
 );
 
+// Materialized per-user credit balance, maintained with every credit change
+export const creditBalance = table('credit_balance', {
+  userId: varchar191('user_id')
+    .primaryKey()
+    .references(() => user.id, { onDelete: 'cascade' }), // user id
+  balance: int('balance').notNull().default(0), // available credits
+  nextExpiresAt: timestamp('next_expires_at'), // earliest expiry of active grants, balance is recomputed after it
+  updatedAt: timestamp('updated_at').defaultNow().onUpdateNow().notNull(),
+});
+
 export const apikey = table(
   'apikey',
   {
@@ -460,6 +471,7 @@ export const aiTask = table(
     costCredits: int('cost_credits').notNull().default(0),
     scene: varchar('scene', { length: 100 }).notNull().default(''),
     creditId: varchar191('credit_id'), // credit consumption record id
+    idempotencyKey: varchar191('idempotency_key'), // client idempotency key, retries return the same task
   },
   (table) => [
     // Composite: Query user's AI tasks by status
@@ -468,6 +480,13 @@ export const aiTask = table(
     // Composite: Query user's AI tasks by media type and provider
     // Can also be used for: WHERE mediaType = ? AND provider = ? (left-prefix)
     index('idx_ai_task_media_type_status').on(table.mediaType, table.status),
+    // Composite: Look up a task by provider task id (status cache, webhooks)
+    index('idx_ai_task_provider_task_id').on(table.provider, table.taskId),
+    // Unique: one task per user and idempotency key (NULL keys never conflict)
+    uniqueIndex('idx_ai_task_user_idempotency_key').on(
+      table.userId,
+      table.idempotencyKey
+    ),
   ]
 );
 
@@ -6,6 +6,7 @@ import {
   pgTable,
   text,
   timestamp,
+  uniqueIndex,
 } from 'drizzle-orm/pg-core';
 
 import { envConfigs } from '@/config';
@@ -355,6 +356,18 @@ export const credit = table(
   ]
 );
 
+// Materialized per-user credit balance, maintained with every credit change
+export const creditBalance = table('credit_balance', {
+  userId: text('user_id')
+    .primaryKey()
+    .references(() => user.id, { onDelete: 'cascade' }), // user id
+  balance: integer('balance').notNull().default(0), // available credits
+  nextExpiresAt: timestamp('next_expires_at'), // earliest expiry of active grants, balance is recomputed after it
+  updatedAt: timestamp('updated_at')
+    .$onUpdate(() => /* @__PURE__ */ new Date())
+    .notNull(),
+});
+
 export const apikey = table(
   'apikey',
   {
@@ -496,6 +509,7 @@ export const aiTask = table(
     costCredits: integer('cost_credits').notNull().default(0),
     scene: text('scene').notNull().default(''),
     creditId: text('credit_id'), // credit consumption record id
+    idempotencyKey: text('idempotency_key'), // client idempotency key, retries return the same task
   },
   (table) => [
     // Composite: Query user's AI tasks by status
@@ -504,6 +518,13 @@ export const aiTask = table(
     // Composite: Query user's AI tasks by media type and provider
     // Can also be used for: WHERE mediaType = ? AND provider = ? (left-prefix)
     index('idx_ai_task_media_type_status').on(table.mediaType, table.status),
+    // Composite: Look up a task by provider task id (status cache, webhooks)
+    index('idx_ai_task_provider_task_id').on(table.provider, table.taskId),
+    // Unique: one task per user and idempotency key (NULL keys never conflict)
+    uniqueIndex('idx_ai_task_user_idempotency_key').on(
+      table.userId,
+      table.idempotencyKey
+    ),
   ]
 );
 
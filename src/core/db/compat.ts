@@ -0,0 +1,106 @@
+import {
+  MySqlDeleteBase,
+  MySqlInsertBase,
+  MySqlInsertBuilder,
+  MySqlUpdateBase,
+  MySqlUpdateBuilder,
+} from 'drizzle-orm/mysql-core';
+import { SQLiteSelectBase } from 'drizzle-orm/sqlite-core';
+
+/**
+ * Dialect adapters.
+ *
+ * Call sites are written against the Postgres query builder. Builders of the
+ * other dialects get the few missing methods added to their prototypes once,
+ * when the first connection is created, so queries run on plain Drizzle
+ * objects with no wrapper per call.
+ */
+
+const PAYLOAD = Symbol('compatPayload');
+
+let mysqlCompatInstalled = false;
+let sqliteCompatInstalled = false;
+
+function defineMethod(proto: any, name: string, fn: (...args: any[]) => any) {
+  if (typeof proto[name] === 'function') return;
+  Object.defineProperty(proto, name, {
+    value: fn,
+    writable: true,
+    configurable: true,
+  });
+}
+
+/**
+ * MySQL:
+ * - `.returning()` does not exist, so it runs the query and returns the
+ *   `.values()` / `.set()` payload instead
+ * - `onConflictDoUpdate` maps to `onDuplicateKeyUpdate`
+ * - `onConflictDoNothing` maps to `INSERT IGNORE`
+ */
+export function installMysqlCompat() {
+  if (mysqlCompatInstalled) return;
+  mysqlCompatInstalled = true;
+
+  // remember the payload on the built query for the `.returning()` fallback
+  const insertValues = (MySqlInsertBuilder.prototype as any).values;
+  (MySqlInsertBuilder.prototype as any).values = function (
+    this: any,
+    ...args: any[]
+  ) {
+    const query = insertValues.apply(this, args);
+    query[PAYLOAD] = args[0];
+    return query;
+  };
+
+  const updateSet = (MySqlUpdateBuilder.prototype as any).set;
+  (MySqlUpdateBuilder.prototype as any).set = function (
+    this: any,
+    ...args: any[]
+  ) {
+    const query = updateSet.apply(this, args);
+    query[PAYLOAD] = args[0];
+    return query;
+  };
+
+  async function returning(this: any) {
+    // Ensure the query actually runs.
+    await this;
+    const payload = this[PAYLOAD];
+    if (payload === undefined) return [];
+    return Array.isArray(payload) ? payload : [payload];
+  }
+
+  for (const base of [MySqlInsertBase, MySqlUpdateBase, MySqlDeleteBase]) {
+    defineMethod(base.prototype, 'returning', returning);
+  }
+
+  defineMethod(
+    MySqlInsertBase.prototype,
+    'onConflictDoUpdate',
+    function (this: any, cfg: any) {
+      return this.onDuplicateKeyUpdate({ set: cfg?.set });
+    }
+  );
+
+  defineMethod(
+    MySqlInsertBase.prototype,
+    'onConflictDoNothing',
+    function (this: any) {
+      this.config.ignore = true;
+      return this;
+    }
+  );
+}
+
+/**
+ * SQLite/Turso:
+ * - no row-level locking, `.for(...)` on select queries is a no-op
+ */
+export function installSqliteCompat() {
+  if (sqliteCompatInstalled) return;
+  sqliteCompatInstalled = true;
+
+  defineMethod(SQLiteSelectBase.prototype, 'for', function (this: any) {
+    return this;
+  });
+}
@@ -4,11 +4,17 @@ import mysql from 'mysql2';
 import { envConfigs } from '@/config';
 import { isCloudflareWorker } from '@/shared/lib/env';
 
+import { installMysqlCompat } from './compat';
+import { getDbLogger } from './query-counter';
+
 // Global database connection instance (singleton pattern)
 let dbInstance: ReturnType<typeof drizzle> | null = null;
 let pool: ReturnType<typeof mysql.createPool> | null = null;
 
 export function getMysqlDb() {
+  // patch builders with the postgres-only methods call sites use, once
+  installMysqlCompat();
+
   let databaseUrl = envConfigs.database_url;
 
   let isHyperdrive = false;
@@ -40,7 +46,7 @@ export function getMysqlDb() {
       waitForConnections: true,
     });
 
-    return drizzle({ client });
+    return drizzle({ client, logger: getDbLogger() });
   }
 
   // Singleton mode: reuse existing connection (good for traditional servers and serverless warm starts)
@@ -58,7 +64,7 @@ export function getMysqlDb() {
       waitForConnections: true,
     });
 
-    dbInstance = drizzle({ client: pool });
+    dbInstance = drizzle({ client: pool, logger: getDbLogger() });
     return dbInstance;
   }
 
@@ -71,7 +77,7 @@ export function getMysqlDb() {
     waitForConnections: true,
   });
 
-  return drizzle(serverlessClient);
+  return drizzle({ client: serverlessClient, logger: getDbLogger() });
 }
 
 // Optional: Function to close database connection (useful for testing or graceful shutdown)
@@ -4,6 +4,8 @@ import postgres from 'postgres';
 import { envConfigs } from '@/config';
 import { isCloudflareWorker } from '@/shared/lib/env';
 
+import { getDbLogger } from './query-counter';
+
 // Global database connection instance (singleton pattern)
 let dbInstance: ReturnType<typeof drizzle> | null = null;
 let client: ReturnType<typeof postgres> | null = null;
@@ -46,7 +48,7 @@ export function getPostgresDb() {
       ...connectionSchemaOptions,
     });
 
-    return drizzle(client);
+    return drizzle({ client, logger: getDbLogger() });
   }
 
   // Singleton mode: reuse existing connection (good for traditional servers and serverless warm starts)
@@ -65,7 +67,7 @@ export function getPostgresDb() {
       ...connectionSchemaOptions,
     });
 
-    dbInstance = drizzle({ client });
+    dbInstance = drizzle({ client, logger: getDbLogger() });
     return dbInstance;
   }
 
@@ -79,7 +81,7 @@ export function getPostgresDb() {
     ...connectionSchemaOptions,
   });
 
-  return drizzle({ client: serverlessClient });
+  return drizzle({ client: serverlessClient, logger: getDbLogger() });
 }
 
 // Optional: Function to close database connection (useful for testing or graceful shutdown)
@@ -0,0 +1,28 @@
+import type { Logger } from 'drizzle-orm/logger';
+
+// statements sent to the database by this process, read by benchmarks
+let queryCount = 0;
+
+/**
+ * Drizzle logger that only counts statements.
+ * Transactions add BEGIN / COMMIT round trips that drizzle does not log.
+ */
+const queryCounter: Logger = {
+  logQuery() {
+    queryCount++;
+  },
+};
+
+/**
+ * logger for new drizzle instances, the counter is only attached when
+ * DB_QUERY_COUNT_ENABLED=true (set by benchmark scripts)
+ */
+export function getDbLogger(): Logger | undefined {
+  return process.env.DB_QUERY_COUNT_ENABLED === 'true'
+    ? queryCounter
+    : undefined;
+}
+
+export function getDbQueryCount() {
+  return queryCount;
+}
@@ -4,11 +4,17 @@ import { drizzle } from 'drizzle-orm/libsql';
 import { envConfigs } from '@/config';
 import { isCloudflareWorker } from '@/shared/lib/env';
 
+import { installSqliteCompat } from './compat';
+import { getDbLogger } from './query-counter';
+
 // SQLite/libsql singleton (only used when DB_SINGLETON_ENABLED === 'true' and not in Workers)
 let sqliteDbInstance: ReturnType<typeof drizzle> | null = null;
 
 // get sqlite db instance (works for both local sqlite file:... and turso/libsql://...)
 export function getSqliteDb() {
+  // patch builders with the postgres-only methods call sites use, once
+  installSqliteCompat();
+
   const databaseUrl = envConfigs.database_url;
   if (!databaseUrl) {
     throw new Error('DATABASE_URL is not set');
@@ -26,7 +32,7 @@ export function getSqliteDb() {
       url: databaseUrl,
       ...options,
     });
-    return drizzle({ client });
+    return drizzle({ client, logger: getDbLogger() });
   }
 
   // Singleton mode: reuse existing instance
@@ -37,7 +43,7 @@ export function getSqliteDb() {
       url: databaseUrl,
       ...options,
     });
-    sqliteDbInstance = drizzle({ client });
+    sqliteDbInstance = drizzle({ client, logger: getDbLogger() });
     return sqliteDbInstance;
   }
 
@@ -46,5 +52,5 @@ export function getSqliteDb() {
     url: databaseUrl,
     ...options,
   });
-  return drizzle({ client });
+  return drizzle({ client, logger: getDbLogger() });
 }
@@ -1,3 +1,5 @@
+import { createLimit } from '@/shared/lib/concurrency';
+
 import { AIFile, AIMediaType, AIProvider } from './types';
 
 export * from './types';
@@ -44,6 +46,10 @@ export class AIManager {
   }
 }
 
+// max concurrent file transfers across all saveFiles calls
+const SAVE_FILES_CONCURRENCY = 2;
+const saveFilesLimit = createLimit(SAVE_FILES_CONCURRENCY);
+
 // save files to custom storage
 export async function saveFiles(files: AIFile[]) {
   try {
@@ -51,17 +57,30 @@ export async function saveFiles(files: AIFile[]) {
     const storageService = await getStorageService();
 
     const uploadedFiles = await Promise.all(
-      files.map(async (file) => {
-        const result = await storageService.downloadAndUpload({
-          url: file.url,
-          contentType: file.contentType,
-          key: file.key,
-        });
-        return {
-          ...file,
-          url: result.url,
-        } as AIFile;
-      })
+      files.map((file) =>
+        saveFilesLimit(async () => {
+          const result = await storageService.downloadAndUpload({
+            url: file.url,
+            contentType: file.contentType,
+            key: file.key,
+          });
+
+          if (result.success && result.bytes !== undefined) {
+            const seconds = (result.durationMs || 0) / 1000;
+            const mbps = seconds > 0 ? result.bytes / 1024 / 1024 / seconds : 0;
+            console.log(
+              `save file ${file.key}: ${result.bytes} bytes in ${seconds.toFixed(2)}s (${mbps.toFixed(2)} MB/s)`
+            );
+          } else if (!result.success) {
+            console.log(`save file ${file.key} failed:`, result.error);
+          }
+
+          return {
+            ...file,
+            url: result.url,
+          } as AIFile;
+        })
+      )
     );
 
     return uploadedFiles;
@@ -351,6 +351,7 @@ class ReplicateAPI {
     prompt: string;
     aspectRatio?: '16:9' | '9:16' | '1:1';
     duration?: number;
+    callbackUrl?: string;
   }) {
     const provider = this.getProvider();
     return provider.generate({
@@ -362,6 +363,7 @@ class ReplicateAPI {
           aspect_ratio: params.aspectRatio || '16:9',
           num_videos: 1,
         },
+        callbackUrl: params.callbackUrl,
       },
     });
   }
@@ -370,6 +372,7 @@ class ReplicateAPI {
     prompt: string;
     imageUrl: string;
     duration?: number;
+    callbackUrl?: string;
   }) {
     const provider = this.getProvider();
     return provider.generate({
@@ -380,6 +383,7 @@ class ReplicateAPI {
         options: {
           image: params.imageUrl,
         },
+        callbackUrl: params.callbackUrl,
       },
     });
   }
@@ -400,6 +404,12 @@ class ReplicateAPI {
       error: result.taskInfo?.errorMessage,
     };
   }
+
+  async cancelPrediction(taskId: string) {
+    const provider = this.getProvider();
+    await provider.client.predictions.cancel(taskId);
+    return { success: true };
+  }
 }
 
 export const replicateAPI = new ReplicateAPI();
@@ -34,6 +34,9 @@ export interface StorageUploadResult {
   url?: string;
   error?: string;
   provider: string;
+  // transferred bytes and duration, set by downloadAndUpload
+  bytes?: number;
+  durationMs?: number;
 }
 
 /**
@@ -166,3 +169,4 @@ export const storageManager = new StorageManager();
 // Export all providers
 export * from './s3';
 export * from './r2';
+export * from './multipart';
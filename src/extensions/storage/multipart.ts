@@ -0,0 +1,228 @@
+import type { AwsClient } from 'aws4fetch';
+
+import { withRetry } from '@/shared/lib/concurrency';
+
+/**
+ * Streaming upload options for S3 compatible storage
+ */
+export interface StreamUploadOptions {
+  client: AwsClient;
+  // object url: <endpoint>/<bucket>/<key>
+  url: string;
+  body: ReadableStream<Uint8Array>;
+  contentType?: string;
+  disposition?: 'inline' | 'attachment';
+  // fixed part size, S3 and R2 require >= 5 MiB for all parts but the last
+  partSize?: number;
+  // parts uploaded at the same time
+  concurrency?: number;
+  // retries per part
+  retries?: number;
+}
+
+export interface StreamUploadResult {
+  bytes: number;
+  parts: number;
+}
+
+const DEFAULT_PART_SIZE = 8 * 1024 * 1024;
+const DEFAULT_CONCURRENCY = 3;
+const DEFAULT_RETRIES = 3;
+
+async function ensureOk(response: Response, action: string) {
+  if (!response.ok) {
+    const text = await response.text().catch(() => '');
+    throw new Error(
+      `${action} failed: ${response.status} ${response.statusText} ${text}`.trim()
+    );
+  }
+  return response;
+}
+
+function escapeXml(value: string) {
+  return value
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;')
+    .replace(/"/g, '&quot;');
+}
+
+/**
+ * Upload a stream with S3 multipart upload.
+ *
+ * The stream is cut into fixed-size parts and at most `concurrency` parts are
+ * in flight, so memory stays at roughly (concurrency + 1) parts whatever the
+ * object size. Streams smaller than one part fall back to a single PUT.
+ */
+export async function uploadStream({
+  client,
+  url,
+  body,
+  contentType = 'application/octet-stream',
+  disposition = 'inline',
+  partSize = DEFAULT_PART_SIZE,
+  concurrency = DEFAULT_CONCURRENCY,
+  retries = DEFAULT_RETRIES,
+}: StreamUploadOptions): Promise<StreamUploadResult> {
+  const reader = body.getReader();
+
+  let uploadId = '';
+  const etags: string[] = [];
+  const inflight = new Set<Promise<void>>();
+  let partNumber = 0;
+  let bytes = 0;
+
+  let buffer = new Uint8Array(partSize);
+  let filled = 0;
+
+  // first failed part, parts run detached so the error is kept here
+  let failure: unknown;
+  const throwIfFailed = () => {
+    if (failure) throw failure;
+  };
+
+  const createUpload = async () => {
+    const response = await ensureOk(
+      await client.fetch(`${url}?uploads`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': contentType,
+          'Content-Disposition': disposition,
+        },
+      }),
+      'Create multipart upload'
+    );
+    const xml = await response.text();
+    const match = /<UploadId>([^<]+)<\/UploadId>/.exec(xml);
+    if (!match) {
+      throw new Error('Create multipart upload failed: no UploadId');
+    }
+    return match[1];
+  };
+
+  const uploadPart = async (part: Uint8Array, number: number) => {
+    const response = await withRetry(
+      async () =>
+        ensureOk(
+          await client.fetch(
+            `${url}?partNumber=${number}&uploadId=${encodeURIComponent(uploadId)}`,
+            {
+              method: 'PUT',
+              headers: { 'Content-Length': part.length.toString() },
+              body: part as any,
+            }
+          ),
+          `Upload part ${number}`
+        ),
+      { retries }
+    );
+    etags[number - 1] = response.headers.get('etag') || '';
+  };
+
+  const dispatchPart = async (part: Uint8Array) => {
+    if (!uploadId) {
+      uploadId = await createUpload();
+    }
+
+    // wait for a free slot before reading more of the stream
+    while (inflight.size >= concurrency) {
+      await Promise.race(inflight);
+    }
+    throwIfFailed();
+
+    const number = ++partNumber;
+    const task: Promise<void> = uploadPart(part, number)
+      .catch((e) => {
+        failure = failure || e;
+      })
+      .finally(() => {
+        inflight.delete(task);
+      });
+    inflight.add(task);
+  };
+
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      let offset = 0;
+      while (offset < value.length) {
+        const size = Math.min(partSize - filled, value.length - offset);
+        buffer.set(value.subarray(offset, offset + size), filled);
+        filled += size;
+        offset += size;
+        bytes += size;
+
+        if (filled === partSize) {
+          await dispatchPart(buffer);
+          buffer = new Uint8Array(partSize);
+          filled = 0;
+        }
+      }
+    }
+
+    // small object, a single PUT is cheaper than a multipart upload
+    if (!uploadId) {
+      await withRetry(
+        async () =>
+          ensureOk(
+            await client.fetch(url, {
+              method: 'PUT',
+              headers: {
+                'Content-Type': contentType,
+                'Content-Disposition': disposition,
+                'Content-Length': filled.toString(),
+              },
+              body: buffer.subarray(0, filled) as any,
+            }),
+            'Upload'
+          ),
+        { retries }
+      );
+      return { bytes, parts: 1 };
+    }
+
+    if (filled > 0) {
+      await dispatchPart(buffer.subarray(0, filled));
+    }
+    await Promise.all(inflight);
+    throwIfFailed();
+
+    const partsXml = etags
+      .map(
+        (etag, index) =>
+          `<Part><PartNumber>${index + 1}</PartNumber><ETag>${escapeXml(etag)}</ETag></Part>`
+      )
+      .join('');
+
+    await withRetry(
+      async () =>
+        ensureOk(
+          await client.fetch(
+            `${url}?uploadId=${encodeURIComponent(uploadId)}`,
+            {
+              method: 'POST',
+              headers: { 'Content-Type': 'application/xml' },
+              body: `<CompleteMultipartUpload>${partsXml}</CompleteMultipartUpload>`,
+            }
+          ),
+          'Complete multipart upload'
+        ),
+      { retries }
+    );
+
+    return { bytes, parts: partNumber };
+  } catch (error) {
+    await reader.cancel().catch(() => {});
+    await Promise.all(inflight);
+    if (uploadId) {
+      await client
+        .fetch(`${url}?uploadId=${encodeURIComponent(uploadId)}`, {
+          method: 'DELETE',
+        })
+        .catch(() => {});
+    }
+    throw error;
+  }
+}
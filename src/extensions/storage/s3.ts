@@ -5,6 +5,7 @@ import type {
   StorageUploadOptions,
   StorageUploadResult,
 } from '.';
+import { uploadStream } from './multipart';
 
 /**
  * S3 storage provider configs
@@ -139,6 +140,16 @@ export class S3Provider implements StorageProvider {
     options: StorageDownloadUploadOptions
   ): Promise<StorageUploadResult> {
     try {
+      const uploadBucket = options.bucket || this.configs.bucket;
+      if (!uploadBucket) {
+        return {
+          success: false,
+          error: 'Bucket is required',
+          provider: this.name,
+        };
+      }
+
+      const startTime = Date.now();
       const response = await fetch(options.url);
       if (!response.ok) {
         return {
@@ -156,16 +167,41 @@ export class S3Provider implements StorageProvider {
         };
       }
 
-      const arrayBuffer = await response.arrayBuffer();
-      const body = new Uint8Array(arrayBuffer);
+      const url = `${this.configs.endpoint}/${uploadBucket}/${options.key}`;
 
-      return this.uploadFile({
-        body,
-        key: options.key,
-        bucket: options.bucket,
-        contentType: options.contentType,
+      const { AwsClient } = await import('aws4fetch');
+      const client = new AwsClient({
+        accessKeyId: this.configs.accessKeyId,
+        secretAccessKey: this.configs.secretAccessKey,
+        region: this.configs.region,
+      });
+
+      // stream the response into a multipart upload, memory stays at a few parts
+      const { bytes } = await uploadStream({
+        client,
+        url,
+        body: response.body,
+        contentType:
+          options.contentType ||
+          response.headers.get('content-type') ||
+          'application/octet-stream',
         disposition: options.disposition,
       });
+
+      const publicUrl =
+        this.getPublicUrl({ key: options.key, bucket: uploadBucket }) || url;
+
+      return {
+        success: true,
+        location: url,
+        bucket: uploadBucket,
+        key: options.key,
+        filename: options.key.split('/').pop(),
+        url: publicUrl,
+        provider: this.name,
+        bytes,
+        durationMs: Date.now() - startTime,
+      };
     } catch (error) {
       return {
         success: false,
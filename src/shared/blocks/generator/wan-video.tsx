@@ -59,68 +59,110 @@ function useWanVideoGenerator() {
   const [videoUrl, setVideoUrl] = useState<string>('');
   const [error, setError] = useState<string>('');
 
-  // Poll task status
+  // Subscribe to task status (SSE push, polling as fallback)
   useEffect(() => {
     if (!taskId || !provider || taskStatus !== 'generating') return;
 
-    const interval = setInterval(async () => {
-      try {
-        console.log('[Frontend] Polling status for task:', taskId);
-        const response = await fetch(
-          `/api/ai/video/status?taskId=${taskId}&provider=${provider}`
+    const query = `taskId=${encodeURIComponent(taskId)}&provider=${provider}`;
+    let eventSource: EventSource | null = null;
+    let interval: ReturnType<typeof setInterval> | null = null;
+    let finished = false;
+
+    const stop = () => {
+      finished = true;
+      eventSource?.close();
+      if (interval) clearInterval(interval);
+    };
+
+    const handleStatus = (json: any) => {
+      console.log('[Frontend] Status response:', json);
+
+      // Parse response based on format
+      const data = json.data || json;
+      const isSuccess = json.code === 0 || json.success || data.success;
+
+      if (isSuccess) {
+        setProgress(data.progress || 0);
+        const normalizedStatus = String(data.status || '').toLowerCase();
+        const isCompleted = ['completed', 'succeeded', 'success'].includes(
+          normalizedStatus
         );
-        const json = await response.json();
-
-        console.log('[Frontend] Status response:', json);
-
-        // Parse response based on format
-        const data = json.data || json;
-        const isSuccess = json.code === 0 || json.success || data.success;
-
-        if (isSuccess) {
-          setProgress(data.progress || 0);
-          const normalizedStatus = String(data.status || '').toLowerCase();
-          const isCompleted = ['completed', 'succeeded', 'success'].includes(
-            normalizedStatus
-          );
-          const isFailed = ['failed', 'canceled', 'cancelled', 'error'].includes(
-            normalizedStatus
-          );
-          const isProcessing = [
-            'processing',
-            'pending',
-            'starting',
-            'queued',
-            'in_progress',
-          ].includes(normalizedStatus);
-
-          if (isCompleted) {
-            console.log('[Frontend] Task completed! Video URL:', data.videoUrl);
-            setTaskStatus('completed');
-            setVideoUrl(data.videoUrl);
-            setProgress(100);
-          } else if (isFailed) {
-            console.error('[Frontend] Task failed:', data.error);
-            setTaskStatus('failed');
-            setError(data.error?.message || 'Generation failed');
-          } else if (isProcessing) {
-            console.log('[Frontend] Task is processing, progress:', data.progress);
-            setTaskStatus('generating');
-          }
-        } else {
-          const message = json.message || data.details || data.error || 'Status check failed';
-          console.error('[Frontend] Status check failed:', message);
+        const isFailed = ['failed', 'canceled', 'cancelled', 'error'].includes(
+          normalizedStatus
+        );
+        const isProcessing = [
+          'processing',
+          'pending',
+          'starting',
+          'queued',
+          'in_progress',
+        ].includes(normalizedStatus);
+
+        if (isCompleted) {
+          console.log('[Frontend] Task completed! Video URL:', data.videoUrl);
+          stop();
+          setTaskStatus('completed');
+          setVideoUrl(data.videoUrl);
+          setProgress(100);
+        } else if (isFailed) {
+          console.error('[Frontend] Task failed:', data.error);
+          stop();
           setTaskStatus('failed');
-          setError(message);
+          setError(data.error?.message || 'Generation failed');
+        } else if (isProcessing) {
+          console.log('[Frontend] Task is processing, progress:', data.progress);
+          setTaskStatus('generating');
         }
-      } catch (err: any) {
-        console.error('[Frontend] Failed to check status:', err);
+      } else {
+        const message = json.message || data.details || data.error || 'Status check failed';
+        console.error('[Frontend] Status check failed:', message);
+        stop();
         setTaskStatus('failed');
-        setError(err.message || 'Failed to check status');
+        setError(message);
       }
-    }, 1500);
+    };
+
+    const startPolling = () => {
+      if (finished || interval) return;
+      interval = setInterval(async () => {
+        try {
+          console.log('[Frontend] Polling status for task:', taskId);
+          const response = await fetch(`/api/ai/video/status?${query}`);
+          handleStatus(await response.json());
+        } catch (err: any) {
+          console.error('[Frontend] Failed to check status:', err);
+          stop();
+          setTaskStatus('failed');
+          setError(err.message || 'Failed to check status');
+        }
+      }, 1500);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+    } else {
+      eventSource = new EventSource(`/api/ai/video/status/stream?${query}`);
+      const onMessage = (event: MessageEvent) => {
+        try {
+          handleStatus(JSON.parse(event.data));
+        } catch (err) {
+          console.error('[Frontend] Invalid status event:', err);
+        }
+      };
+      eventSource.addEventListener('status', onMessage);
+      eventSource.addEventListener('error', (event: Event) => {
+        // server sent an error event with details
+        if (event instanceof MessageEvent && event.data) {
+          onMessage(event);
+          return;
+        }
+        // stream dropped before the task finished, fall back to polling
+        eventSource?.close();
+        startPolling();
+      });
+    }
 
-    return () => clearInterval(interval);
+    return stop;
   }, [taskId, provider, taskStatus]);
 
   const handleGenerate = async () => {
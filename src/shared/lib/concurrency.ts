@@ -0,0 +1,55 @@
+/**
+ * Limit how many async tasks run at the same time.
+ *
+ * const limit = createLimit(2);
+ * await Promise.all(items.map((item) => limit(() => work(item))));
+ */
+export function createLimit(concurrency: number) {
+  const max = Math.max(1, Math.floor(concurrency) || 1);
+  const queue: (() => void)[] = [];
+  let active = 0;
+
+  const next = () => {
+    if (active >= max) return;
+    const run = queue.shift();
+    if (run) run();
+  };
+
+  return function limit<T>(fn: () => Promise<T>): Promise<T> {
+    return new Promise<T>((resolve, reject) => {
+      queue.push(() => {
+        active++;
+        fn()
+          .then(resolve, reject)
+          .finally(() => {
+            active--;
+            next();
+          });
+      });
+      next();
+    });
+  };
+}
+
+/**
+ * Retry an async task with exponential backoff.
+ */
+export async function withRetry<T>(
+  fn: (attempt: number) => Promise<T>,
+  { retries = 3, delayMs = 500 }: { retries?: number; delayMs?: number } = {}
+): Promise<T> {
+  let lastError: unknown;
+  for (let attempt = 0; attempt <= retries; attempt++) {
+    try {
+      return await fn(attempt);
+    } catch (e) {
+      lastError = e;
+      if (attempt < retries) {
+        await new Promise((resolve) =>
+          setTimeout(resolve, delayMs * 2 ** attempt)
+        );
+      }
+    }
+  }
+  throw lastError;
+}
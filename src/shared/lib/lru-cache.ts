@@ -0,0 +1,180 @@
+/**
+ * Bounded in-process TTL + LRU cache (server side only).
+ *
+ * Caches are registered by name so their hit/miss counters can be read with
+ * `getLruCacheStats()`. They live on globalThis to survive dev hot reloads.
+ */
+
+export interface LruCacheStats {
+  name: string;
+  size: number;
+  maxEntries: number;
+  ttlMs: number;
+  hits: number;
+  misses: number;
+  evictions: number;
+  hitRate: number | null;
+}
+
+export interface LruCache<V> {
+  get(key: string): V | undefined;
+  set(key: string, value: V, ttlMs?: number): void;
+  delete(key: string): void;
+  // drop every entry whose value matches
+  deleteWhere(predicate: (value: V, key: string) => boolean): void;
+  clear(): void;
+  // read through the cache, concurrent misses share one loader call.
+  // ttlMs may depend on the loaded value, a ttl <= 0 skips caching it.
+  load(
+    key: string,
+    loader: () => Promise<V>,
+    ttlMs?: number | ((value: V) => number)
+  ): Promise<V>;
+  stats(): LruCacheStats;
+}
+
+interface Entry<V> {
+  value: V;
+  expiresAt: number;
+}
+
+declare global {
+  // eslint-disable-next-line no-var
+  var __lruCaches: Map<string, LruCache<any>> | undefined;
+}
+
+function getRegistry() {
+  if (!globalThis.__lruCaches) {
+    globalThis.__lruCaches = new Map();
+  }
+  return globalThis.__lruCaches;
+}
+
+export function createLruCache<V>(
+  name: string,
+  { maxEntries, ttlMs }: { maxEntries: number; ttlMs: number }
+): LruCache<V> {
+  const registry = getRegistry();
+  const existing = registry.get(name);
+  if (existing) {
+    return existing as LruCache<V>;
+  }
+
+  // Map keeps insertion order, re-inserting on read makes it an LRU
+  const entries = new Map<string, Entry<V>>();
+  const pending = new Map<string, Promise<V>>();
+  // bumped on delete/clear so in-flight loads don't write stale values back
+  let generation = 0;
+  let hits = 0;
+  let misses = 0;
+  let evictions = 0;
+
+  const cache: LruCache<V> = {
+    get(key) {
+      const entry = entries.get(key);
+      if (!entry) {
+        misses++;
+        return undefined;
+      }
+      if (entry.expiresAt <= Date.now()) {
+        entries.delete(key);
+        misses++;
+        return undefined;
+      }
+      entries.delete(key);
+      entries.set(key, entry);
+      hits++;
+      return entry.value;
+    },
+
+    set(key, value, entryTtlMs = ttlMs) {
+      if (entryTtlMs <= 0) return;
+      entries.delete(key);
+      entries.set(key, { value, expiresAt: Date.now() + entryTtlMs });
+      while (entries.size > maxEntries) {
+        const oldest = entries.keys().next().value;
+        if (oldest === undefined) break;
+        entries.delete(oldest);
+        evictions++;
+      }
+    },
+
+    delete(key) {
+      generation++;
+      entries.delete(key);
+      pending.delete(key);
+    },
+
+    deleteWhere(predicate) {
+      generation++;
+      for (const [key, entry] of entries) {
+        if (predicate(entry.value, key)) {
+          entries.delete(key);
+        }
+      }
+      pending.clear();
+    },
+
+    clear() {
+      generation++;
+      entries.clear();
+      pending.clear();
+    },
+
+    async load(key, loader, entryTtlMs) {
+      const cached = cache.get(key);
+      if (cached !== undefined) {
+        return cached;
+      }
+
+      const inflight = pending.get(key);
+      if (inflight) {
+        return inflight;
+      }
+
+      const loadGeneration = generation;
+      const promise = loader()
+        .then((value) => {
+          if (generation === loadGeneration) {
+            cache.set(
+              key,
+              value,
+              typeof entryTtlMs === 'function' ? entryTtlMs(value) : entryTtlMs
+            );
+          }
+          return value;
+        })
+        .finally(() => {
+          if (pending.get(key) === promise) {
+            pending.delete(key);
+          }
+        });
+      pending.set(key, promise);
+      return promise;
+    },
+
+    stats() {
+      const total = hits + misses;
+      return {
+        name,
+        size: entries.size,
+        maxEntries,
+        ttlMs,
+        hits,
+        misses,
+        evictions,
+        hitRate: total ? hits / total : null,
+      };
+    },
+  };
+
+  registry.set(name, cache);
+  return cache;
+}
+
+/**
+ * hit/miss counters of all registered caches
+ */
+export function getLruCacheStats(): LruCacheStats[] {
+  return Array.from(getRegistry().values()).map((cache) => cache.stats());
+}
@@ -0,0 +1,236 @@
+import { createReadStream, createWriteStream, promises as fsp } from 'fs';
+import { tmpdir } from 'os';
+import { join } from 'path';
+import { Readable } from 'stream';
+import { pipeline } from 'stream/promises';
+
+import { isCloudflareWorker } from '@/shared/lib/env';
+import { md5 } from '@/shared/lib/hash';
+
+/**
+ * Bounded on-disk LRU cache for proxied media.
+ *
+ * Entries are keyed by the resolved upstream url. Each entry is stored as
+ * `<hash>.bin` with a `<hash>.json` sidecar holding the response validators,
+ * so the index can be rebuilt after a restart. Disabled in Cloudflare Workers.
+ */
+
+export interface MediaCacheEntry {
+  key: string;
+  path: string;
+  size: number;
+  contentType: string;
+  etag: string | null;
+  lastModified: string | null;
+}
+
+type Index = Map<string, MediaCacheEntry>;
+
+declare global {
+  // eslint-disable-next-line no-var
+  var __mediaCacheIndex: Promise<Index> | undefined;
+  // eslint-disable-next-line no-var
+  var __mediaCacheInflight: Set<string> | undefined;
+}
+
+const CACHE_DIR =
+  process.env.MEDIA_CACHE_DIR || join(tmpdir(), 'media-proxy-cache');
+// total size cap of the cache directory
+const MAX_TOTAL_BYTES =
+  Number(process.env.MEDIA_CACHE_MAX_BYTES) || 512 * 1024 * 1024;
+// single objects larger than this are streamed through, never cached
+const MAX_ENTRY_BYTES =
+  Number(process.env.MEDIA_CACHE_MAX_ENTRY_BYTES) || 128 * 1024 * 1024;
+
+export const isMediaCacheEnabled =
+  !isCloudflareWorker && process.env.MEDIA_CACHE_ENABLED !== 'false';
+
+function hashKey(key: string) {
+  return md5(key);
+}
+
+async function loadIndex(): Promise<Index> {
+  const index: Index = new Map();
+  await fsp.mkdir(CACHE_DIR, { recursive: true });
+
+  const files = await fsp.readdir(CACHE_DIR);
+  const entries: { entry: MediaCacheEntry; atime: number }[] = [];
+
+  for (const file of files) {
+    if (!file.endsWith('.json')) continue;
+    try {
+      const meta = JSON.parse(
+        await fsp.readFile(join(CACHE_DIR, file), 'utf8')
+      ) as MediaCacheEntry;
+      const stat = await fsp.stat(meta.path);
+      if (stat.size !== meta.size) throw new Error('size mismatch');
+      entries.push({ entry: meta, atime: stat.atimeMs });
+    } catch {
+      // broken entry, drop both files
+      const base = join(CACHE_DIR, file.replace(/\.json$/, ''));
+      await fsp.rm(`${base}.json`, { force: true });
+      await fsp.rm(`${base}.bin`, { force: true });
+    }
+  }
+
+  // oldest first, so iteration order matches LRU order
+  entries.sort((a, b) => a.atime - b.atime);
+  for (const { entry } of entries) {
+    index.set(entry.key, entry);
+  }
+
+  return index;
+}
+
+function getIndex(): Promise<Index> {
+  if (!globalThis.__mediaCacheIndex) {
+    globalThis.__mediaCacheIndex = loadIndex().catch((e) => {
+      console.log('load media cache index failed:', e);
+      return new Map();
+    });
+  }
+  return globalThis.__mediaCacheIndex;
+}
+
+function getInflight(): Set<string> {
+  if (!globalThis.__mediaCacheInflight) {
+    globalThis.__mediaCacheInflight = new Set();
+  }
+  return globalThis.__mediaCacheInflight;
+}
+
+function getTotalBytes(index: Index) {
+  let total = 0;
+  for (const entry of index.values()) total += entry.size;
+  return total;
+}
+
+async function removeEntry(index: Index, entry: MediaCacheEntry) {
+  index.delete(entry.key);
+  await fsp.rm(entry.path, { force: true });
+  await fsp.rm(entry.path.replace(/\.bin$/, '.json'), { force: true });
+}
+
+async function evict(index: Index, incomingBytes: number) {
+  let total = getTotalBytes(index);
+  for (const entry of index.values()) {
+    if (total + incomingBytes <= MAX_TOTAL_BYTES) break;
+    total -= entry.size;
+    await removeEntry(index, entry);
+  }
+}
+
+/**
+ * get a cached entry and mark it as most recently used
+ */
+export async function getMediaCacheEntry(
+  key: string
+): Promise<MediaCacheEntry | undefined> {
+  if (!isMediaCacheEnabled) return undefined;
+
+  const index = await getIndex();
+  const entry = index.get(key);
+  if (!entry) return undefined;
+
+  try {
+    await fsp.access(entry.path);
+  } catch {
+    await removeEntry(index, entry);
+    return undefined;
+  }
+
+  index.delete(key);
+  index.set(key, entry);
+  return entry;
+}
+
+/**
+ * check whether a response of this size can be cached
+ */
+export function isMediaCacheable(size: number) {
+  return isMediaCacheEnabled && size > 0 && size <= MAX_ENTRY_BYTES;
+}
+
+/**
+ * write a response body into the cache.
+ * returns false if the body was not cached (too large, duplicated, or failed).
+ */
+export async function putMediaCacheEntry({
+  key,
+  body,
+  size,
+  contentType,
+  etag,
+  lastModified,
+}: {
+  key: string;
+  body: ReadableStream<Uint8Array>;
+  size: number;
+  contentType: string;
+  etag?: string | null;
+  lastModified?: string | null;
+}): Promise<boolean> {
+  const inflight = getInflight();
+  if (!isMediaCacheable(size) || inflight.has(key)) {
+    await body.cancel().catch(() => {});
+    return false;
+  }
+
+  inflight.add(key);
+  const base = join(CACHE_DIR, hashKey(key));
+  const tmpPath = `${base}.${process.pid}.${Date.now()}.tmp`;
+
+  try {
+    const index = await getIndex();
+
+    await pipeline(
+      Readable.fromWeb(body as any),
+      createWriteStream(tmpPath)
+    );
+
+    const stat = await fsp.stat(tmpPath);
+    if (stat.size !== size) {
+      throw new Error(`incomplete body: ${stat.size}/${size}`);
+    }
+
+    const existing = index.get(key);
+    if (existing) {
+      await removeEntry(index, existing);
+    }
+    await evict(index, size);
+
+    const entry: MediaCacheEntry = {
+      key,
+      path: `${base}.bin`,
+      size,
+      contentType,
+      etag: etag || null,
+      lastModified: lastModified || null,
+    };
+    await fsp.rename(tmpPath, entry.path);
+    await fsp.writeFile(`${base}.json`, JSON.stringify(entry));
+    index.set(key, entry);
+
+    return true;
+  } catch (e) {
+    console.log('put media cache entry failed:', e);
+    await fsp.rm(tmpPath, { force: true });
+    return false;
+  } finally {
+    inflight.delete(key);
+  }
+}
+
+/**
+ * open a cached entry as a web stream, optionally for a byte range (inclusive)
+ */
+export function openMediaCacheStream(
+  entry: MediaCacheEntry,
+  range?: { start: number; end: number }
+): ReadableStream<Uint8Array> {
+  const stream = createReadStream(
+    entry.path,
+    range ? { start: range.start, end: range.end } : undefined
+  );
+  return Readable.toWeb(stream) as ReadableStream<Uint8Array>;
+}
@@ -1,11 +1,20 @@
-import { and, count, desc, eq, sql } from 'drizzle-orm';
+import { and, asc, count, desc, eq, isNull, lte, sql } from 'drizzle-orm';
 
 import { db } from '@/core/db';
 import { aiTask, credit } from '@/config/db/schema';
 import { AITaskStatus } from '@/extensions/ai';
+import {
+  claimAnonymousUsage,
+  releaseAnonymousUsage,
+} from '@/shared/models/anonymous';
 import { appendUserToResult, User } from '@/shared/models/user';
 
-import { consumeCredits, CreditStatus } from './credit';
+import {
+  consumeCredits,
+  CreditStatus,
+  lockCreditBalance,
+  syncCreditBalance,
+} from './credit';
 
 export type AITask = typeof aiTask.$inferSelect & {
   user?: User;
@@ -13,13 +22,19 @@ export type AITask = typeof aiTask.$inferSelect & {
 export type NewAITask = typeof aiTask.$inferInsert;
 export type UpdateAITask = Partial<Omit<NewAITask, 'id' | 'createdAt'>>;
 
-export async function createAITask(newAITask: NewAITask) {
+export async function createAITask(
+  newAITask: NewAITask,
+  { anonymousId }: { anonymousId?: string } = {}
+) {
   const result = await db().transaction(async (tx: any) => {
-    // 1. create task record
-    const [taskResult] = await tx.insert(aiTask).values(newAITask).returning();
+    // 1. claim the anonymous free generation, the primary key stops double claims
+    if (anonymousId) {
+      await claimAnonymousUsage(anonymousId, tx);
+    }
 
+    // 2. consume credits first, so the task is inserted with its credit id
+    let creditId: string | null = null;
     if (newAITask.costCredits && newAITask.costCredits > 0) {
-      // 2. consume credits
       const consumedCredit = await consumeCredits({
         userId: newAITask.userId,
         credits: newAITask.costCredits,
@@ -27,22 +42,20 @@ export async function createAITask(newAITask: NewAITask) {
         description: `generate ${newAITask.mediaType}`,
         metadata: JSON.stringify({
           type: 'ai-task',
-          mediaType: taskResult.mediaType,
-          taskId: taskResult.id,
+          mediaType: newAITask.mediaType,
+          taskId: newAITask.id,
         }),
         tx,
       });
-
-      // 3. update task record with consumed credit id
-      if (consumedCredit && consumedCredit.id) {
-        taskResult.creditId = consumedCredit.id;
-        await tx
-          .update(aiTask)
-          .set({ creditId: consumedCredit.id })
-          .where(eq(aiTask.id, taskResult.id));
-      }
+      creditId = consumedCredit?.id ?? null;
     }
 
+    // 3. create task record
+    const [taskResult] = await tx
+      .insert(aiTask)
+      .values({ ...newAITask, creditId })
+      .returning();
+
     return taskResult;
   });
 
@@ -54,43 +67,111 @@ export async function findAITaskById(id: string) {
   return result;
 }
 
-export async function updateAITaskById(id: string, updateAITask: UpdateAITask) {
-  const result = await db().transaction(async (tx: any) => {
-    // task failed, Revoke credit consumption record
-    if (updateAITask.status === AITaskStatus.FAILED && updateAITask.creditId) {
-      // get consumed credit record
-      const [consumedCredit] = await tx
-        .select()
-        .from(credit)
-        .where(eq(credit.id, updateAITask.creditId));
-      if (consumedCredit && consumedCredit.status === CreditStatus.ACTIVE) {
-        const consumedItems = JSON.parse(consumedCredit.consumedDetail || '[]');
-
-        // console.log('consumedItems', consumedItems);
-
-        // add back consumed credits
-        await Promise.all(
-          consumedItems.map((item: any) => {
-            if (item && item.creditId && item.creditsConsumed > 0) {
-              return tx
-                .update(credit)
-                .set({
-                  remainingCredits: sql`${credit.remainingCredits} + ${item.creditsConsumed}`,
-                })
-                .where(eq(credit.id, item.creditId));
-            }
-          })
-        );
+export async function findAITaskByProviderTaskId({
+  provider,
+  taskId,
+}: {
+  provider: string;
+  taskId: string;
+}) {
+  const [result] = await db()
+    .select()
+    .from(aiTask)
+    .where(and(eq(aiTask.provider, provider), eq(aiTask.taskId, taskId)))
+    .limit(1);
+  return result;
+}
+
+export async function findAITaskByIdempotencyKey({
+  userId,
+  idempotencyKey,
+}: {
+  userId: string;
+  idempotencyKey: string;
+}) {
+  const [result] = await db()
+    .select()
+    .from(aiTask)
+    .where(
+      and(
+        eq(aiTask.userId, userId),
+        eq(aiTask.idempotencyKey, idempotencyKey)
+      )
+    )
+    .limit(1);
+  return result;
+}
+
+/**
+ * revoke a credit consumption record and add its credits back to the grants.
+ * runs under the balance lock, so concurrent refunds of one record refund once.
+ */
+async function refundConsumedCredit(creditId: string, tx: any) {
+  // get consumed credit record
+  const [consumedCreditRef] = await tx
+    .select({ userId: credit.userId })
+    .from(credit)
+    .where(eq(credit.id, creditId));
+  if (!consumedCreditRef) {
+    return;
+  }
+
+  // lock balance before touching credit rows, same order as consume.
+  // the status check below must run under the lock, or concurrent
+  // FAILED updates would both see ACTIVE and refund twice.
+  await lockCreditBalance(consumedCreditRef.userId, tx);
+
+  const [consumedCredit] = await tx
+    .select()
+    .from(credit)
+    .where(eq(credit.id, creditId))
+    .for('update');
+  if (!consumedCredit || consumedCredit.status !== CreditStatus.ACTIVE) {
+    return;
+  }
+
+  const consumedItems = JSON.parse(consumedCredit.consumedDetail || '[]');
 
-        // delete consumed credit record
-        await tx
+  // add back consumed credits
+  await Promise.all(
+    consumedItems.map((item: any) => {
+      if (item && item.creditId && item.creditsConsumed > 0) {
+        return tx
           .update(credit)
           .set({
-            status: CreditStatus.DELETED,
+            remainingCredits: sql`${credit.remainingCredits} + ${item.creditsConsumed}`,
           })
-          .where(eq(credit.id, updateAITask.creditId));
+          .where(eq(credit.id, item.creditId));
       }
-    }
+    })
+  );
+
+  // delete consumed credit record
+  await tx
+    .update(credit)
+    .set({
+      status: CreditStatus.DELETED,
+    })
+    .where(eq(credit.id, creditId));
+
+  // refunded credits are back in the balance
+  await syncCreditBalance(consumedCredit.userId, tx);
+}
+
+export async function updateAITaskById(id: string, updateAITask: UpdateAITask) {
+  // nothing to refund, a single statement needs no transaction
+  if (updateAITask.status !== AITaskStatus.FAILED || !updateAITask.creditId) {
+    const [result] = await db()
+      .update(aiTask)
+      .set(updateAITask)
+      .where(eq(aiTask.id, id))
+      .returning();
+    return result;
+  }
+
+  const result = await db().transaction(async (tx: any) => {
+    // task failed, Revoke credit consumption record
+    await refundConsumedCredit(updateAITask.creditId as string, tx);
 
     // update task
     const [result] = await tx
@@ -105,6 +186,139 @@ export async function updateAITaskById(id: string, updateAITask: UpdateAITask) {
   return result;
 }
 
+// a task reserved before the provider call that still has no provider task
+// after this long was lost (crash, function timeout) and is failed + refunded
+const AI_TASK_RESERVATION_TIMEOUT_MS =
+  Number(process.env.AI_TASK_RESERVATION_TIMEOUT_MS) || 5 * 60 * 1000;
+
+// anonymous tasks are stored with an `anon_` prefixed user id
+const ANONYMOUS_USER_PREFIX = 'anon_';
+
+function isAITaskReserved(task: AITask) {
+  return task.status === AITaskStatus.PENDING && !task.taskId;
+}
+
+export function isStaleAITaskReservation(task: AITask) {
+  return (
+    isAITaskReserved(task) &&
+    new Date(task.createdAt).getTime() + AI_TASK_RESERVATION_TIMEOUT_MS <=
+      Date.now()
+  );
+}
+
+/**
+ * attach the provider task to a reserved task.
+ * returns false if the reservation was failed in the meantime.
+ */
+export async function attachAITaskProviderTask(
+  id: string,
+  updateAITask: UpdateAITask
+): Promise<boolean> {
+  return db().transaction(async (tx: any) => {
+    const [current] = await tx
+      .select()
+      .from(aiTask)
+      .where(eq(aiTask.id, id))
+      .for('update');
+    if (!current || !isAITaskReserved(current)) {
+      return false;
+    }
+
+    await tx.update(aiTask).set(updateAITask).where(eq(aiTask.id, id));
+    return true;
+  });
+}
+
+/**
+ * fail a reserved task: refund its credits, give back the anonymous free
+ * usage and free the idempotency key for a retry.
+ * returns false if the provider task was attached first.
+ */
+export async function failAITaskReservation(
+  task: AITask,
+  taskInfo: Record<string, any>
+): Promise<boolean> {
+  const failed = await db().transaction(async (tx: any) => {
+    // balance before task row, same lock order as the refund path
+    if (task.creditId) {
+      await lockCreditBalance(task.userId, tx);
+    }
+
+    const [current] = await tx
+      .select()
+      .from(aiTask)
+      .where(eq(aiTask.id, task.id))
+      .for('update');
+    if (!current || !isAITaskReserved(current)) {
+      return false;
+    }
+
+    if (current.creditId) {
+      await refundConsumedCredit(current.creditId, tx);
+    }
+
+    await tx
+      .update(aiTask)
+      .set({
+        status: AITaskStatus.FAILED,
+        idempotencyKey: null,
+        taskInfo: JSON.stringify(taskInfo),
+      })
+      .where(eq(aiTask.id, task.id));
+    return true;
+  });
+
+  if (failed && task.userId.startsWith(ANONYMOUS_USER_PREFIX)) {
+    await releaseAnonymousUsage(
+      task.userId.slice(ANONYMOUS_USER_PREFIX.length)
+    );
+  }
+
+  return failed;
+}
+
+/**
+ * fail and refund every reservation older than the timeout
+ */
+export async function failStaleAITaskReservations({
+  batchSize = 500,
+}: { batchSize?: number } = {}) {
+  const staleBefore = new Date(Date.now() - AI_TASK_RESERVATION_TIMEOUT_MS);
+  let failed = 0;
+
+  while (true) {
+    // failed tasks drop out of the filter, so every batch starts at offset 0
+    const tasks = await db()
+      .select()
+      .from(aiTask)
+      .where(
+        and(
+          eq(aiTask.status, AITaskStatus.PENDING),
+          isNull(aiTask.taskId),
+          lte(aiTask.createdAt, staleBefore)
+        )
+      )
+      .orderBy(asc(aiTask.createdAt))
+      .limit(batchSize);
+
+    for (const task of tasks) {
+      if (
+        await failAITaskReservation(task, {
+          errorMessage: 'reservation expired before the provider task was created',
+        })
+      ) {
+        failed += 1;
+      }
+    }
+
+    if (tasks.length < batchSize) {
+      break;
+    }
+  }
+
+  return failed;
+}
+
 export async function getAITasksCount({
   userId,
   status,
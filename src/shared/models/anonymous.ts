@@ -2,6 +2,8 @@ import { eq } from 'drizzle-orm';
 import { db } from '@/core/db';
 import { anonymousUsage } from '@/config/db/schema';
 
+export const ANONYMOUS_USAGE_EXCEEDED = 'anonymous free usage already used';
+
 /**
  * Check if an anonymous user has used their free generation
  */
@@ -33,3 +35,38 @@ export async function recordAnonymousUsage(anonymousId: string): Promise<void> {
     console.error('Error recording anonymous usage:', error);
   }
 }
+
+/**
+ * Claim the free generation inside a transaction, throws if it was used
+ */
+export async function claimAnonymousUsage(
+  anonymousId: string,
+  tx: any
+): Promise<void> {
+  const [record] = await tx
+    .select({ id: anonymousUsage.id })
+    .from(anonymousUsage)
+    .where(eq(anonymousUsage.id, anonymousId))
+    .limit(1);
+
+  if (record) {
+    throw new Error(ANONYMOUS_USAGE_EXCEEDED);
+  }
+
+  // a concurrent claim fails on the primary key and rolls back its transaction
+  await tx.insert(anonymousUsage).values({
+    id: anonymousId,
+    usedAt: new Date(),
+  });
+}
+
+/**
+ * Give the free generation back, e.g. when no provider accepted the task
+ */
+export async function releaseAnonymousUsage(anonymousId: string): Promise<void> {
+  try {
+    await db().delete(anonymousUsage).where(eq(anonymousUsage.id, anonymousId));
+  } catch (error) {
+    console.error('Error releasing anonymous usage:', error);
+  }
+}
@@ -38,6 +38,7 @@ export async function saveConfigs(configs: Record<string, string>) {
   });
 
   revalidateTag(CACHE_TAG_CONFIGS, 'max');
+  invalidateConfigsSnapshot();
 
   return result;
 }
@@ -45,6 +46,7 @@ export async function saveConfigs(configs: Record<string, string>) {
 export async function addConfig(newConfig: NewConfig) {
   const [result] = await db().insert(config).values(newConfig).returning();
   revalidateTag(CACHE_TAG_CONFIGS, 'max');
+  invalidateConfigsSnapshot();
 
   return result;
 }
@@ -75,8 +77,61 @@ export const getConfigs = unstable_cache(
   }
 );
 
-export async function getAllConfigs(): Promise<Configs> {
+/**
+ * Merged configs (env defaults < db < env overrides), frozen and shared.
+ * `version` changes whenever the merged configs change.
+ */
+export interface ConfigsSnapshot {
+  version: number;
+  configs: Readonly<Configs>;
+}
+
+// how often config changes saved on other server instances are picked up
+const CONFIGS_SNAPSHOT_TTL_MS = 60 * 1000;
+
+let snapshot: ConfigsSnapshot | null = null;
+let snapshotDbConfigs: Configs | null = null;
+let snapshotCheckedAt = 0;
+let snapshotVersion = 0;
+// bumped on invalidation so a refresh started before a save can't store old values
+let snapshotGeneration = 0;
+let pendingSnapshot: Promise<ConfigsSnapshot> | null = null;
+let envOverrides: Promise<Configs> | null = null;
+let publicConfigs: { version: number; configs: Configs } | null = null;
+
+/**
+ * setting values set in env, they win over db values. env doesn't change
+ * at runtime so this is computed once.
+ */
+function getEnvOverrides(): Promise<Configs> {
+  if (!envOverrides) {
+    envOverrides = getAllSettingNames().then((settingNames) => {
+      const overrides: Configs = {};
+      settingNames.forEach((key) => {
+        const upperKey = key.toUpperCase();
+        // use env configs if available
+        if (process.env[upperKey]) {
+          overrides[key] = process.env[upperKey] ?? '';
+        } else if (process.env[key]) {
+          overrides[key] = process.env[key] ?? '';
+        }
+      });
+      return overrides;
+    });
+  }
+  return envOverrides;
+}
+
+function isSameConfigs(a: Configs, b: Configs) {
+  const keys = Object.keys(a);
+  if (keys.length !== Object.keys(b).length) return false;
+  return keys.every((key) => a[key] === b[key]);
+}
+
+async function refreshConfigsSnapshot(): Promise<ConfigsSnapshot> {
+  const generation = snapshotGeneration;
   let dbConfigs: Configs = {};
+  let loaded = true;
 
   // only get configs from db in server side
   if (typeof window === 'undefined' && envConfigs.database_url) {
@@ -84,44 +139,114 @@ export async function getAllConfigs(): Promise<Configs> {
       dbConfigs = await getConfigs();
     } catch (e) {
       console.log(`get configs from db failed:`, e);
-      dbConfigs = {};
+      loaded = false;
+      // keep serving the last good configs, retry on the next call
+      if (snapshot) return snapshot;
     }
   }
 
-  const settingNames = await getAllSettingNames();
-  settingNames.forEach((key) => {
-    const upperKey = key.toUpperCase();
-    // use env configs if available
-    if (process.env[upperKey]) {
-      dbConfigs[key] = process.env[upperKey] ?? '';
-    } else if (process.env[key]) {
-      dbConfigs[key] = process.env[key] ?? '';
-    }
-  });
+  if (generation !== snapshotGeneration) {
+    return getConfigsSnapshot();
+  }
 
-  const configs = {
+  if (loaded) {
+    snapshotCheckedAt = Date.now();
+  }
+
+  if (
+    snapshot &&
+    snapshotDbConfigs &&
+    isSameConfigs(snapshotDbConfigs, dbConfigs)
+  ) {
+    return snapshot;
+  }
+
+  const configs = Object.freeze({
     ...envConfigs,
     ...dbConfigs,
+    ...(await getEnvOverrides()),
+  });
+  if (generation !== snapshotGeneration) {
+    return getConfigsSnapshot();
+  }
+
+  snapshotDbConfigs = dbConfigs;
+  snapshot = { version: ++snapshotVersion, configs };
+  return snapshot;
+}
+
+export async function getConfigsSnapshot(): Promise<ConfigsSnapshot> {
+  if (snapshot && Date.now() - snapshotCheckedAt < CONFIGS_SNAPSHOT_TTL_MS) {
+    return snapshot;
+  }
+
+  let pending = pendingSnapshot;
+  if (!pending) {
+    const refresh: Promise<ConfigsSnapshot> = refreshConfigsSnapshot().finally(
+      () => {
+        if (pendingSnapshot === refresh) pendingSnapshot = null;
+      }
+    );
+    pendingSnapshot = pending = refresh;
+  }
+
+  // serve the previous snapshot while it is re-checked in the background
+  return snapshot ?? pending;
+}
+
+/**
+ * drop the snapshot after configs are saved, the next read rebuilds it
+ */
+export function invalidateConfigsSnapshot() {
+  snapshotGeneration++;
+  pendingSnapshot = null;
+  snapshot = null;
+  snapshotDbConfigs = null;
+  snapshotCheckedAt = 0;
+}
+
+/**
+ * memoize a service built from configs per snapshot version.
+ * configs other than the current snapshot always build a fresh instance.
+ */
+export function createConfigsMemo<T>(build: (configs: Configs) => T) {
+  let value: T | undefined;
+  let version = -1;
+
+  return async (configs?: Configs): Promise<T> => {
+    const current = await getConfigsSnapshot();
+    if (configs && configs !== current.configs) {
+      return build(configs);
+    }
+
+    if (version !== current.version) {
+      value = build(current.configs as Configs);
+      version = current.version;
+    }
+    return value as T;
   };
+}
 
-  return configs;
+export async function getAllConfigs(): Promise<Configs> {
+  const { configs } = await getConfigsSnapshot();
+  return configs as Configs;
 }
 
 export async function getPublicConfigs(): Promise<Configs> {
-  let allConfigs = await getAllConfigs();
+  const current = await getConfigsSnapshot();
+  if (publicConfigs?.version === current.version) {
+    return publicConfigs.configs;
+  }
 
-  const publicConfigs: Record<string, string> = {};
+  const configs: Record<string, string> = {};
 
   // get public configs
-  for (const key in allConfigs) {
-    if (publicSettingNames.includes(key)) {
-      publicConfigs[key] = String(allConfigs[key]);
+  for (const key of publicSettingNames) {
+    if (key in current.configs) {
+      configs[key] = String(current.configs[key]);
     }
   }
 
-  const configs = {
-    ...publicConfigs,
-  };
-
-  return configs;
+  publicConfigs = { version: current.version, configs: Object.freeze(configs) };
+  return publicConfigs.configs;
 }
@@ -1,7 +1,20 @@
-import { and, asc, count, desc, eq, gt, isNull, or, sum } from 'drizzle-orm';
+import {
+  and,
+  asc,
+  count,
+  desc,
+  eq,
+  gt,
+  inArray,
+  isNull,
+  min,
+  or,
+  sql,
+  sum,
+} from 'drizzle-orm';
 
 import { db } from '@/core/db';
-import { credit } from '@/config/db/schema';
+import { credit, creditBalance } from '@/config/db/schema';
 import { getSnowId, getUuid } from '@/shared/lib/hash';
 
 import { getAllConfigs } from './config';
@@ -72,10 +85,209 @@ export function createExpirationCondition() {
 
 // create credit
 export async function createCredit(newCredit: NewCredit) {
-  const [result] = await db().insert(credit).values(newCredit).returning();
+  const result = await db().transaction(async (tx: any) => {
+    await lockCreditBalance(newCredit.userId, tx);
+
+    const [result] = await tx.insert(credit).values(newCredit).returning();
+
+    // keep the materialized balance in sync with the new grant
+    await syncCreditBalance(newCredit.userId, tx);
+
+    return result;
+  });
+
   return result;
 }
 
+// in-process read cache for hot balances, bounded and short-lived
+const BALANCE_CACHE_TTL_MS = 3000;
+const BALANCE_CACHE_MAX_SIZE = 5000;
+
+type BalanceCache = Map<string, { balance: number; expiresAt: number }>;
+
+declare global {
+  // eslint-disable-next-line no-var
+  var __creditBalanceCache: BalanceCache | undefined;
+}
+
+function getBalanceCache(): BalanceCache {
+  if (!globalThis.__creditBalanceCache) {
+    globalThis.__creditBalanceCache = new Map();
+  }
+  return globalThis.__creditBalanceCache;
+}
+
+function setCachedBalance(
+  userId: string,
+  balance: number,
+  nextExpiresAt?: Date | null
+) {
+  const cache = getBalanceCache();
+  if (cache.size >= BALANCE_CACHE_MAX_SIZE) {
+    const oldest = cache.keys().next().value;
+    if (oldest !== undefined) cache.delete(oldest);
+  }
+
+  // never serve a cached balance past the next grant expiry
+  let expiresAt = Date.now() + BALANCE_CACHE_TTL_MS;
+  if (nextExpiresAt) {
+    expiresAt = Math.min(expiresAt, nextExpiresAt.getTime());
+  }
+  cache.set(userId, { balance, expiresAt });
+}
+
+export function invalidateCreditBalanceCache(userId: string) {
+  getBalanceCache().delete(userId);
+}
+
+// active grant rows that still hold credits
+function activeGrantCondition(userId: string, currentTime: Date) {
+  return and(
+    eq(credit.userId, userId),
+    eq(credit.transactionType, CreditTransactionType.GRANT),
+    eq(credit.status, CreditStatus.ACTIVE),
+    gt(credit.remainingCredits, 0),
+    or(
+      isNull(credit.expiresAt), // Never expires
+      gt(credit.expiresAt, currentTime) // Not yet expired
+    )
+  );
+}
+
+function toDate(value: any): Date | null {
+  if (!value) return null;
+  return value instanceof Date ? value : new Date(value);
+}
+
+// balance row is missing or one of its grants has expired since it was computed
+function isBalanceStale(
+  balanceRow: { nextExpiresAt?: any } | undefined,
+  currentTime: Date
+) {
+  if (!balanceRow) return true;
+  const nextExpiresAt = toDate(balanceRow.nextExpiresAt);
+  if (!nextExpiresAt) return false;
+  // an unreadable value (e.g. mysql zero date) forces a recompute
+  return isNaN(nextExpiresAt.getTime()) || nextExpiresAt <= currentTime;
+}
+
+// next_expires_at of a placeholder balance row, in the past and inside the
+// range of every dialect (mysql TIMESTAMP starts at 1970-01-01 00:00:01 UTC)
+const PLACEHOLDER_EXPIRES_AT = new Date('2000-01-01T00:00:00Z');
+
+/**
+ * lock the user's balance row, call it first in a transaction
+ * so every credit change takes locks in the same order
+ */
+export async function lockCreditBalance(userId: string, tx: any) {
+  // FOR UPDATE on a missing row locks nothing, make sure the row exists.
+  // the placeholder is already expired, so it gets recomputed before use.
+  await tx
+    .insert(creditBalance)
+    .values({
+      userId,
+      balance: 0,
+      nextExpiresAt: PLACEHOLDER_EXPIRES_AT,
+      updatedAt: new Date(),
+    })
+    .onConflictDoNothing({ target: creditBalance.userId });
+
+  const [balanceRow] = await tx
+    .select()
+    .from(creditBalance)
+    .where(eq(creditBalance.userId, userId))
+    .for('update');
+
+  return balanceRow;
+}
+
+/**
+ * recompute the user's balance from grant rows and store it.
+ * used for grants, refunds, expiries and reconciliation.
+ */
+export async function syncCreditBalance(
+  userId: string,
+  tx?: any
+): Promise<number> {
+  const execute = async (tx: any) => {
+    const currentTime = new Date();
+
+    const [result] = await tx
+      .select({
+        total: sum(credit.remainingCredits),
+        nextExpiresAt: min(credit.expiresAt),
+      })
+      .from(credit)
+      .where(activeGrantCondition(userId, currentTime));
+
+    const balance = parseInt(result?.total || '0');
+    const nextExpiresAt = toDate(result?.nextExpiresAt);
+
+    await tx
+      .insert(creditBalance)
+      .values({
+        userId,
+        balance,
+        nextExpiresAt,
+        updatedAt: currentTime,
+      })
+      .onConflictDoUpdate({
+        target: creditBalance.userId,
+        set: {
+          balance,
+          nextExpiresAt,
+          updatedAt: currentTime,
+        },
+      });
+
+    invalidateCreditBalanceCache(userId);
+
+    return balance;
+  };
+
+  // use provided transaction
+  if (tx) {
+    return await execute(tx);
+  }
+
+  return await db().transaction(async (tx: any) => {
+    await lockCreditBalance(userId, tx);
+    return execute(tx);
+  });
+}
+
+/**
+ * periodic reconciliation: recompute every balance from grant rows
+ */
+export async function reconcileCreditBalances({
+  batchSize = 500,
+}: { batchSize?: number } = {}) {
+  let page = 1;
+  let reconciled = 0;
+
+  while (true) {
+    const users = await db()
+      .selectDistinct({ userId: credit.userId })
+      .from(credit)
+      .where(eq(credit.transactionType, CreditTransactionType.GRANT))
+      .orderBy(asc(credit.userId))
+      .limit(batchSize)
+      .offset((page - 1) * batchSize);
+
+    for (const { userId } of users) {
+      await syncCreditBalance(userId);
+      reconciled += 1;
+    }
+
+    if (users.length < batchSize) {
+      break;
+    }
+    page += 1;
+  }
+
+  return reconciled;
+}
+
 // get credits
 export async function getCredits({
   userId,
@@ -161,34 +373,18 @@ export async function consumeCredits({
 
   // consume credits
   const execute = async (tx: any) => {
-    // 1. check credits balance
-    const [creditsBalance] = await tx
-      .select({
-        total: sum(credit.remainingCredits),
-      })
-      .from(credit)
-      .where(
-        and(
-          eq(credit.userId, userId),
-          eq(credit.transactionType, CreditTransactionType.GRANT),
-          eq(credit.status, CreditStatus.ACTIVE),
-          gt(credit.remainingCredits, 0),
-          or(
-            isNull(credit.expiresAt), // Never expires
-            gt(credit.expiresAt, currentTime) // Not yet expired
-          )
-        )
-      );
+    // 1. check credits balance, the locked balance row serializes consumes per user
+    const balanceRow = await lockCreditBalance(userId, tx);
+
+    let balance = balanceRow?.balance ?? 0;
+    if (isBalanceStale(balanceRow, currentTime)) {
+      // missing row or a grant expired since the last update
+      balance = await syncCreditBalance(userId, tx);
+    }
 
     // balance is not enough
-    if (
-      !creditsBalance ||
-      !creditsBalance.total ||
-      parseInt(creditsBalance.total) < credits
-    ) {
-      throw new Error(
-        `Insufficient credits, ${creditsBalance?.total || 0} < ${credits}`
-      );
+    if (balance < credits) {
+      throw new Error(`Insufficient credits, ${balance} < ${credits}`);
     }
 
     // 2. get available credits, FIFO queue with expiresAt, batch query
@@ -201,29 +397,22 @@ export async function consumeCredits({
     const consumedItems: any[] = [];
 
     while (remainingToConsume > 0) {
+      if (batchNo > maxBatchNo) {
+        throw new Error(`Too many batches: ${batchNo} > ${maxBatchNo}`);
+      }
+
       // get batch credits
+      // fully consumed rows drop out of the filter, so every batch starts at offset 0
       const batchCredits = await tx
         .select()
         .from(credit)
-        .where(
-          and(
-            eq(credit.userId, userId),
-            eq(credit.transactionType, CreditTransactionType.GRANT),
-            eq(credit.status, CreditStatus.ACTIVE),
-            gt(credit.remainingCredits, 0),
-            or(
-              isNull(credit.expiresAt), // Never expires
-              gt(credit.expiresAt, currentTime) // Not yet expired
-            )
-          )
-        )
+        .where(activeGrantCondition(userId, currentTime))
         .orderBy(
           // FIFO queue: expired credits first, then by expiration date
           // NULL values (never expires) will be ordered last
           asc(credit.expiresAt)
         )
         .limit(batchSize) // batch size
-        .offset((batchNo - 1) * batchSize) // offset
         .for('update'); // lock for update
 
       // no more credits
@@ -232,6 +421,7 @@ export async function consumeCredits({
       }
 
       // consume credits for each item
+      const updates: { id: string; remainingCredits: number }[] = [];
       for (const item of batchCredits) {
         // no need to consume more
         if (remainingToConsume <= 0) {
@@ -239,11 +429,10 @@ export async function consumeCredits({
         }
         const toConsume = Math.min(remainingToConsume, item.remainingCredits);
 
-        // update remaining credits
-        await tx
-          .update(credit)
-          .set({ remainingCredits: item.remainingCredits - toConsume })
-          .where(eq(credit.id, item.id));
+        updates.push({
+          id: item.id,
+          remainingCredits: item.remainingCredits - toConsume,
+        });
 
         // update consumed items
         consumedItems.push({
@@ -258,14 +447,35 @@ export async function consumeCredits({
           batchNo: batchNo,
         });
 
-        batchNo += 1;
         remainingToConsume -= toConsume;
-
-        // if too many batches, throw error
-        if (batchNo > maxBatchNo) {
-          throw new Error(`Too many batches: ${batchNo} > ${maxBatchNo}`);
-        }
       }
+
+      // update remaining credits of the whole batch in one statement
+      await tx
+        .update(credit)
+        .set({
+          remainingCredits: sql`case ${credit.id} ${sql.join(
+            updates.map(
+              (item) => sql`when ${item.id} then ${item.remainingCredits}`
+            ),
+            sql` `
+          )} else ${credit.remainingCredits} end`,
+        })
+        .where(
+          inArray(
+            credit.id,
+            updates.map((item) => item.id)
+          )
+        );
+
+      batchNo += 1;
+    }
+
+    // grant rows are the source of truth, never debit less than requested
+    if (remainingToConsume > 0) {
+      throw new Error(
+        `Insufficient credits, ${credits - remainingToConsume} < ${credits}`
+      );
     }
 
     // 3. create consumed credit
@@ -283,6 +493,17 @@ export async function consumeCredits({
     };
     await tx.insert(credit).values(consumedCredit);
 
+    // 4. debit the materialized balance
+    await tx
+      .update(creditBalance)
+      .set({
+        balance: sql`${creditBalance.balance} - ${credits}`,
+        updatedAt: currentTime,
+      })
+      .where(eq(creditBalance.userId, userId));
+
+    invalidateCreditBalanceCache(userId);
+
     return consumedCredit;
   };
 
@@ -292,32 +513,40 @@ export async function consumeCredits({
   }
 
   // use default transaction
-  return await db().transaction(execute);
+  const result = await db().transaction(execute);
+  invalidateCreditBalanceCache(userId);
+
+  return result;
 }
 
 // get remaining credits
 export async function getRemainingCredits(userId: string): Promise<number> {
+  const cached = getBalanceCache().get(userId);
+  if (cached && cached.expiresAt > Date.now()) {
+    return cached.balance;
+  }
+
   const currentTime = new Date();
 
-  const [result] = await db()
-    .select({
-      total: sum(credit.remainingCredits),
-    })
-    .from(credit)
-    .where(
-      and(
-        eq(credit.userId, userId),
-        eq(credit.transactionType, CreditTransactionType.GRANT),
-        eq(credit.status, CreditStatus.ACTIVE),
-        gt(credit.remainingCredits, 0),
-        or(
-          isNull(credit.expiresAt), // Never expires
-          gt(credit.expiresAt, currentTime) // Not yet expired
-        )
-      )
-    );
+  const [balanceRow] = await db()
+    .select()
+    .from(creditBalance)
+    .where(eq(creditBalance.userId, userId));
+
+  if (isBalanceStale(balanceRow, currentTime)) {
+    // backfill a missing row, or apply grants expired since the last update
+    const balance = await syncCreditBalance(userId);
+    setCachedBalance(userId, balance);
+    return balance;
+  }
+
+  setCachedBalance(
+    userId,
+    balanceRow.balance,
+    toDate(balanceRow.nextExpiresAt)
+  );
 
-  return parseInt(result?.total || '0');
+  return balanceRow.balance;
 }
 
 // grant credits for new user
@@ -4,7 +4,7 @@ import { db } from '@/core/db';
 import { credit, order, subscription } from '@/config/db/schema';
 import { PaymentType } from '@/extensions/payment/types';
 
-import { NewCredit } from './credit';
+import { lockCreditBalance, NewCredit, syncCreditBalance } from './credit';
 import {
   NewSubscription,
   UpdateSubscription,
@@ -271,12 +271,17 @@ export async function updateOrderInTransaction({
         .where(eq(credit.orderNo, orderNo));
 
       if (!existingCredit) {
+        await lockCreditBalance(newCredit.userId, tx);
+
         // create credit
         const [creditResult] = await tx
           .insert(credit)
           .values(newCredit)
           .returning();
 
+        // keep the materialized balance in sync with the new grant
+        await syncCreditBalance(newCredit.userId, tx);
+
         existingCredit = creditResult;
       }
 
@@ -392,12 +397,17 @@ export async function updateSubscriptionInTransaction({
       }
 
       if (!existingCredit) {
+        await lockCreditBalance(newCredit.userId, tx);
+
         // create credit
         const [creditResult] = await tx
           .insert(credit)
           .values(newCredit)
           .returning();
 
+        // keep the materialized balance in sync with the new grant
+        await syncCreditBalance(newCredit.userId, tx);
+
         existingCredit = creditResult;
       }
 
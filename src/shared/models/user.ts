@@ -1,9 +1,11 @@
 import { headers } from 'next/headers';
+import { getSessionCookie } from 'better-auth/cookies';
 import { count, desc, eq, inArray } from 'drizzle-orm';
 
 import { getAuth } from '@/core/auth';
 import { db } from '@/core/db';
 import { user } from '@/config/db/schema';
+import { createLruCache } from '@/shared/lib/lru-cache';
 
 import { Permission, Role } from '../services/rbac';
 import { getRemainingCredits } from './credit';
@@ -29,6 +31,8 @@ export async function updateUser(userId: string, updatedUser: UpdateUser) {
     .where(eq(user.id, userId))
     .returning();
 
+  invalidateSessionCache({ userId });
+
   return result;
 }
 
@@ -87,13 +91,62 @@ export async function getUserCredits(userId: string) {
   return { remainingCredits };
 }
 
+type SessionUser = NonNullable<
+  Awaited<ReturnType<Awaited<ReturnType<typeof getAuth>>['api']['getSession']>>
+>['user'];
+
+// session token -> user, saves a session lookup on every api request
+const SESSION_CACHE_TTL_MS = 30 * 1000;
+const sessionCache = createLruCache<SessionUser | null>('session-user', {
+  maxEntries: 5000,
+  ttlMs: SESSION_CACHE_TTL_MS,
+});
+
 export async function getSignUser() {
-  const auth = await getAuth();
-  const session = await auth.api.getSession({
-    headers: await headers(),
-  });
+  const requestHeaders = await headers();
+  const token = getSessionCookie(requestHeaders);
+  if (!token) {
+    return undefined;
+  }
 
-  return session?.user;
+  let expiresAt = 0;
+  const user = await sessionCache.load(
+    token,
+    async () => {
+      const auth = await getAuth();
+      const session = await auth.api.getSession({
+        headers: requestHeaders,
+      });
+      expiresAt = session ? new Date(session.session.expiresAt).getTime() : 0;
+      return session?.user ?? null;
+    },
+    // never keep a session past its own expiry, don't cache missing sessions
+    (user) =>
+      user ? Math.min(SESSION_CACHE_TTL_MS, expiresAt - Date.now()) : 0
+  );
+
+  return user ?? undefined;
+}
+
+/**
+ * drop cached sessions, for sign out and account changes
+ */
+export function invalidateSessionCache({
+  token,
+  userId,
+}: {
+  token?: string | null;
+  userId?: string;
+}) {
+  if (token) {
+    const cached = sessionCache.get(token);
+    sessionCache.delete(token);
+    // also drop the user's other sessions, e.g. after revoking them
+    userId = userId || cached?.id;
+  }
+  if (userId) {
+    sessionCache.deleteWhere((user) => user?.id === userId);
+  }
 }
 
 export async function isEmailVerified(email: string): Promise<boolean> {
@@ -5,7 +5,7 @@ import {
   KieProvider,
   ReplicateProvider,
 } from '@/extensions/ai';
-import { Configs, getAllConfigs } from '@/shared/models/config';
+import { Configs, createConfigsMemo } from '@/shared/models/config';
 
 /**
  * get ai manager with configs
@@ -52,18 +52,13 @@ export function getAIManagerWithConfigs(configs: Configs) {
 }
 
 /**
- * global ai service
+ * global ai service, rebuilt when the configs snapshot changes
  */
-let aiService: AIManager | null = null;
+const aiService = createConfigsMemo(getAIManagerWithConfigs);
 
 /**
  * get ai service manager
  */
 export async function getAIService(configs?: Configs): Promise<AIManager> {
-  if (!configs) {
-    configs = await getAllConfigs();
-  }
-  aiService = getAIManagerWithConfigs(configs);
-
-  return aiService;
+  return aiService(configs);
 }
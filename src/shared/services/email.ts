@@ -1,5 +1,5 @@
 import { EmailManager, ResendProvider } from '@/extensions/email';
-import { Configs, getAllConfigs } from '@/shared/models/config';
+import { Configs, createConfigsMemo } from '@/shared/models/config';
 
 /**
  * get email service with configs
@@ -20,9 +20,9 @@ export function getEmailServiceWithConfigs(configs: Configs) {
 }
 
 /**
- * global email service
+ * global email service, rebuilt when the configs snapshot changes
  */
-let emailService: EmailManager | null = null;
+const emailService = createConfigsMemo(getEmailServiceWithConfigs);
 
 /**
  * get email service instance
@@ -30,10 +30,5 @@ let emailService: EmailManager | null = null;
 export async function getEmailService(
   configs?: Configs
 ): Promise<EmailManager> {
-  if (!configs) {
-    configs = await getAllConfigs();
-  }
-  emailService = getEmailServiceWithConfigs(configs);
-
-  return emailService;
+  return emailService(configs);
 }
@@ -10,7 +10,7 @@ import {
   PaymentType,
 } from '@/extensions/payment/types';
 import { getSnowId, getUuid } from '@/shared/lib/hash';
-import { Configs, getAllConfigs } from '@/shared/models/config';
+import { Configs, createConfigsMemo } from '@/shared/models/config';
 
 import {
   calculateCreditExpirationTime,
@@ -101,9 +101,9 @@ export function getPaymentServiceWithConfigs(configs: Configs) {
 }
 
 /**
- * global payment service
+ * global payment service, rebuilt when the configs snapshot changes
  */
-let paymentService: PaymentManager | null = null;
+const paymentService = createConfigsMemo(getPaymentServiceWithConfigs);
 
 /**
  * get payment service instance
@@ -111,12 +111,7 @@ let paymentService: PaymentManager | null = null;
 export async function getPaymentService(
   configs?: Configs
 ): Promise<PaymentManager> {
-  if (!configs) {
-    configs = await getAllConfigs();
-  }
-  paymentService = getPaymentServiceWithConfigs(configs);
-
-  return paymentService;
+  return paymentService(configs);
 }
 
 /**
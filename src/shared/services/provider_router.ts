@@ -0,0 +1,319 @@
+/**
+ * Health-scored routing for AI providers.
+ *
+ * Keeps rolling latency and error-rate stats per provider and model, opens a
+ * circuit breaker on providers that keep failing, and tries the healthiest
+ * provider first. Optionally hedges a second provider once the first one is
+ * slower than its usual p95, and cancels whichever result loses.
+ */
+
+export interface ProviderCandidate<T> {
+  provider: string;
+  model: string;
+  // create the task on this provider
+  run: () => Promise<T>;
+  // cancel a task created by this provider after another one won the hedge
+  cancel?: (result: T) => Promise<unknown>;
+}
+
+export interface ProviderMetrics {
+  provider: string;
+  model: string;
+  samples: number;
+  successRate: number | null;
+  p50: number | null;
+  p95: number | null;
+  circuit: 'closed' | 'open' | 'half-open';
+  consecutiveFailures: number;
+}
+
+interface Sample {
+  latencyMs: number;
+  ok: boolean;
+}
+
+interface ProviderStats {
+  provider: string;
+  model: string;
+  samples: Sample[];
+  consecutiveFailures: number;
+  openedUntil: number;
+  halfOpenTrial: boolean;
+}
+
+type Store = Map<string, ProviderStats>;
+
+declare global {
+  // eslint-disable-next-line no-var
+  var __providerRouterStore: Store | undefined;
+}
+
+// rolling window of recent calls per provider + model
+const WINDOW_SIZE = 100;
+// consecutive failures that open the circuit
+const FAILURE_THRESHOLD = 3;
+// how long an open circuit rejects calls before a trial call is allowed
+const OPEN_DURATION_MS = 30 * 1000;
+// hedge delay bounds, the delay itself is the primary's p95
+const MIN_HEDGE_DELAY_MS = 2000;
+const MAX_HEDGE_DELAY_MS = 20000;
+const DEFAULT_HEDGE_DELAY_MS = 8000;
+// error rate weight when scoring providers, in ms of latency
+const ERROR_PENALTY_MS = 60000;
+
+function getStore(): Store {
+  if (!globalThis.__providerRouterStore) {
+    globalThis.__providerRouterStore = new Map();
+  }
+  return globalThis.__providerRouterStore;
+}
+
+function getStats(provider: string, model: string): ProviderStats {
+  const store = getStore();
+  const key = `${provider}:${model}`;
+  let stats = store.get(key);
+  if (!stats) {
+    stats = {
+      provider,
+      model,
+      samples: [],
+      consecutiveFailures: 0,
+      openedUntil: 0,
+      halfOpenTrial: false,
+    };
+    store.set(key, stats);
+  }
+  return stats;
+}
+
+function percentile(values: number[], p: number): number | null {
+  if (values.length === 0) return null;
+  const sorted = [...values].sort((a, b) => a - b);
+  const index = Math.min(
+    sorted.length - 1,
+    Math.max(0, Math.ceil((p / 100) * sorted.length) - 1)
+  );
+  return sorted[index];
+}
+
+function getCircuitState(stats: ProviderStats): ProviderMetrics['circuit'] {
+  if (stats.consecutiveFailures < FAILURE_THRESHOLD) return 'closed';
+  return stats.openedUntil > Date.now() ? 'open' : 'half-open';
+}
+
+/**
+ * record the outcome of a provider call
+ */
+export function recordProviderResult(
+  provider: string,
+  model: string,
+  latencyMs: number,
+  ok: boolean
+) {
+  const stats = getStats(provider, model);
+
+  stats.samples.push({ latencyMs, ok });
+  if (stats.samples.length > WINDOW_SIZE) {
+    stats.samples.shift();
+  }
+
+  stats.halfOpenTrial = false;
+  if (ok) {
+    stats.consecutiveFailures = 0;
+    stats.openedUntil = 0;
+  } else {
+    stats.consecutiveFailures += 1;
+    if (stats.consecutiveFailures >= FAILURE_THRESHOLD) {
+      stats.openedUntil = Date.now() + OPEN_DURATION_MS;
+    }
+  }
+}
+
+/**
+ * run a provider call and record its latency and outcome
+ */
+export async function trackProviderCall<T>(
+  provider: string,
+  model: string,
+  fn: () => Promise<T>
+): Promise<T> {
+  const startTime = Date.now();
+  try {
+    const result = await fn();
+    recordProviderResult(provider, model, Date.now() - startTime, true);
+    return result;
+  } catch (e) {
+    recordProviderResult(provider, model, Date.now() - startTime, false);
+    throw e;
+  }
+}
+
+/**
+ * check the circuit breaker, a half-open circuit lets one trial call through
+ */
+function acquireProvider(provider: string, model: string): boolean {
+  const stats = getStats(provider, model);
+  const state = getCircuitState(stats);
+  if (state === 'closed') return true;
+  if (state === 'open' || stats.halfOpenTrial) return false;
+
+  stats.halfOpenTrial = true;
+  return true;
+}
+
+function getScore(provider: string, model: string): number {
+  const stats = getStats(provider, model);
+  if (stats.samples.length === 0) return 0;
+
+  const errors = stats.samples.filter((s) => !s.ok).length;
+  const errorRate = errors / stats.samples.length;
+  const p50 =
+    percentile(
+      stats.samples.filter((s) => s.ok).map((s) => s.latencyMs),
+      50
+    ) ?? 0;
+
+  return p50 + errorRate * ERROR_PENALTY_MS;
+}
+
+function getHedgeDelay(provider: string, model: string): number {
+  const stats = getStats(provider, model);
+  const p95 = percentile(
+    stats.samples.filter((s) => s.ok).map((s) => s.latencyMs),
+    95
+  );
+  if (p95 === null) return DEFAULT_HEDGE_DELAY_MS;
+  return Math.min(MAX_HEDGE_DELAY_MS, Math.max(MIN_HEDGE_DELAY_MS, p95));
+}
+
+/**
+ * order candidates: closed circuits first, then by health score.
+ * candidates with no stats keep their configured order.
+ */
+export function rankProviders<T>(
+  candidates: ProviderCandidate<T>[]
+): ProviderCandidate<T>[] {
+  return candidates
+    .map((candidate, index) => {
+      const stats = getStats(candidate.provider, candidate.model);
+      return {
+        candidate,
+        index,
+        open: getCircuitState(stats) === 'open' ? 1 : 0,
+        score: getScore(candidate.provider, candidate.model),
+      };
+    })
+    .sort((a, b) => a.open - b.open || a.score - b.score || a.index - b.index)
+    .map((item) => item.candidate);
+}
+
+/**
+ * run candidates in health order until one succeeds.
+ *
+ * with `hedge`, the next candidate is started once the current one runs past
+ * its p95 latency. the first success wins, later successes are cancelled.
+ */
+export async function routeProviders<T>(
+  candidates: ProviderCandidate<T>[],
+  { hedge = false }: { hedge?: boolean } = {}
+): Promise<{ result: T; provider: string; model: string; errors: string[] }> {
+  const ranked = rankProviders(candidates);
+  const errors: string[] = [];
+
+  return new Promise((resolve, reject) => {
+    let next = 0;
+    let running = 0;
+    let settled = false;
+    let hedgeTimer: ReturnType<typeof setTimeout> | undefined;
+
+    const finishIfExhausted = () => {
+      if (!settled && running === 0 && next >= ranked.length) {
+        settled = true;
+        reject(new Error(errors.join(' | ') || 'no provider succeeded'));
+      }
+    };
+
+    const start = () => {
+      if (settled) return;
+
+      // skip providers with an open circuit
+      let candidate: ProviderCandidate<T> | undefined;
+      while (!candidate && next < ranked.length) {
+        const item = ranked[next++];
+        if (acquireProvider(item.provider, item.model)) {
+          candidate = item;
+        } else {
+          errors.push(`${item.provider}: circuit open`);
+        }
+      }
+      if (!candidate) {
+        finishIfExhausted();
+        return;
+      }
+      running += 1;
+
+      if (hedgeTimer) clearTimeout(hedgeTimer);
+      if (hedge && next < ranked.length) {
+        hedgeTimer = setTimeout(
+          start,
+          getHedgeDelay(candidate.provider, candidate.model)
+        );
+      }
+
+      trackProviderCall(candidate.provider, candidate.model, candidate.run)
+        .then((result) => {
+          if (settled) {
+            // lost the hedge, don't leave a paid task running upstream
+            candidate.cancel?.(result).catch((e) => {
+              console.log(`cancel ${candidate.provider} task failed:`, e);
+            });
+            return;
+          }
+          settled = true;
+          if (hedgeTimer) clearTimeout(hedgeTimer);
+          resolve({
+            result,
+            provider: candidate.provider,
+            model: candidate.model,
+            errors,
+          });
+        })
+        .catch((e) => {
+          errors.push(
+            `${candidate.provider}: ${e instanceof Error ? e.message : String(e)}`
+          );
+          // fail over right away instead of waiting for the hedge delay
+          if (!settled && running === 1) start();
+        })
+        .finally(() => {
+          running -= 1;
+          finishIfExhausted();
+        });
+    };
+
+    start();
+  });
+}
+
+/**
+ * rolling stats of all providers, for the metrics endpoint
+ */
+export function getProviderMetrics(): ProviderMetrics[] {
+  return Array.from(getStore().values()).map((stats) => {
+    const latencies = stats.samples.filter((s) => s.ok).map((s) => s.latencyMs);
+    const successes = latencies.length;
+
+    return {
+      provider: stats.provider,
+      model: stats.model,
+      samples: stats.samples.length,
+      successRate: stats.samples.length
+        ? successes / stats.samples.length
+        : null,
+      p50: percentile(latencies, 50),
+      p95: percentile(latencies, 95),
+      circuit: getCircuitState(stats),
+      consecutiveFailures: stats.consecutiveFailures,
+    };
+  });
+}
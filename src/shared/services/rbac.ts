@@ -4,6 +4,7 @@ import { and, eq, gt, inArray, isNull, or } from 'drizzle-orm';
 import { db } from '@/core/db';
 import { permission, role, rolePermission, userRole } from '@/config/db/schema';
 import { getUuid } from '@/shared/lib/hash';
+import { createLruCache } from '@/shared/lib/lru-cache';
 import { getAllConfigs } from '@/shared/models/config';
 import { User } from '@/shared/models/user';
 
@@ -85,6 +86,7 @@ export async function updateRole(
     .set(updates)
     .where(eq(role.id, roleId))
     .returning();
+  invalidateUserAccess();
   return result;
 }
 
@@ -93,6 +95,7 @@ export async function updateRole(
  */
 export async function deleteRole(roleId: string): Promise<void> {
   await db().delete(role).where(eq(role.id, roleId));
+  invalidateUserAccess();
 }
 
 /**
@@ -167,6 +170,7 @@ export async function assignPermissionToRole(
       permissionId,
     })
     .returning();
+  invalidateUserAccess();
   return result;
 }
 
@@ -185,6 +189,7 @@ export async function removePermissionFromRole(
         eq(rolePermission.permissionId, permissionId)
       )
     );
+  invalidateUserAccess();
 }
 
 /**
@@ -209,12 +214,82 @@ export async function assignPermissionsToRole(
         }))
       );
   }
+
+  // the role may be held by any user
+  invalidateUserAccess();
+}
+
+interface PermissionNode {
+  children: Map<string, PermissionNode>;
+  // the exact code ends here
+  exact: boolean;
+  // "<prefix>.*" grants everything below this node
+  wildcard: boolean;
+}
+
+interface UserAccess {
+  roles: Role[];
+  permissions: Permission[];
+  matcher: PermissionNode;
+}
+
+// user -> roles + permissions, role expiry is picked up within the ttl
+const userAccessCache = createLruCache<UserAccess>('rbac-user-access', {
+  maxEntries: 5000,
+  ttlMs: 60 * 1000,
+});
+
+function createPermissionNode(): PermissionNode {
+  return { children: new Map(), exact: false, wildcard: false };
 }
 
 /**
- * Get user's roles
+ * build a prefix trie of permission codes, "*" and "a.b.*" become wildcards
  */
-export const getUserRoles = cache(async (userId: string): Promise<Role[]> => {
+function buildPermissionMatcher(codes: string[]): PermissionNode {
+  const root = createPermissionNode();
+
+  for (const code of codes) {
+    const parts = code.split('.');
+    let node = root;
+    parts.forEach((part, index) => {
+      if (part === '*' && index === parts.length - 1) {
+        node.wildcard = true;
+        return;
+      }
+      let child = node.children.get(part);
+      if (!child) {
+        child = createPermissionNode();
+        node.children.set(part, child);
+      }
+      node = child;
+      if (index === parts.length - 1) {
+        node.exact = true;
+      }
+    });
+  }
+
+  return root;
+}
+
+function matchPermission(root: PermissionNode, permissionCode: string) {
+  // "*" (super admin)
+  if (root.wildcard) return true;
+
+  const parts = permissionCode.split('.');
+  let node = root;
+  for (let i = 0; i < parts.length; i++) {
+    const child = node.children.get(parts[i]);
+    if (!child) return false;
+    node = child;
+    // "admin.*" covers "admin.xxx" but not "admin" itself
+    if (node.wildcard && i < parts.length - 1) return true;
+  }
+
+  return node.exact;
+}
+
+async function loadUserRoles(userId: string): Promise<Role[]> {
   const now = new Date();
   const result = await db()
     .select({
@@ -240,6 +315,60 @@ export const getUserRoles = cache(async (userId: string): Promise<Role[]> => {
     );
 
   return result;
+}
+
+async function loadUserAccess(userId: string): Promise<UserAccess> {
+  const roles = await loadUserRoles(userId);
+  if (roles.length === 0) {
+    return { roles, permissions: [], matcher: buildPermissionMatcher([]) };
+  }
+
+  const roleIds = roles.map((r) => r.id);
+
+  const permissions = await db()
+    .selectDistinct({
+      id: permission.id,
+      code: permission.code,
+      resource: permission.resource,
+      action: permission.action,
+      title: permission.title,
+      description: permission.description,
+      createdAt: permission.createdAt,
+      updatedAt: permission.updatedAt,
+    })
+    .from(rolePermission)
+    .innerJoin(permission, eq(rolePermission.permissionId, permission.id))
+    .where(inArray(rolePermission.roleId, roleIds));
+
+  return {
+    roles,
+    permissions,
+    matcher: buildPermissionMatcher(permissions.map((p) => p.code)),
+  };
+}
+
+const getUserAccess = cache(
+  (userId: string): Promise<UserAccess> =>
+    userAccessCache.load(userId, () => loadUserAccess(userId))
+);
+
+/**
+ * Drop cached roles and permissions, of one user or of everyone
+ */
+export function invalidateUserAccess(userId?: string) {
+  if (userId) {
+    userAccessCache.delete(userId);
+  } else {
+    userAccessCache.clear();
+  }
+}
+
+/**
+ * Get user's roles
+ */
+export const getUserRoles = cache(async (userId: string): Promise<Role[]> => {
+  const { roles } = await getUserAccess(userId);
+  return roles;
 });
 
 /**
@@ -247,27 +376,8 @@ export const getUserRoles = cache(async (userId: string): Promise<Role[]> => {
  */
 export const getUserPermissions = cache(
   async (userId: string): Promise<Permission[]> => {
-    const roles = await getUserRoles(userId);
-    if (roles.length === 0) return [];
-
-    const roleIds = roles.map((r) => r.id);
-
-    const result = await db()
-      .selectDistinct({
-        id: permission.id,
-        code: permission.code,
-        resource: permission.resource,
-        action: permission.action,
-        title: permission.title,
-        description: permission.description,
-        createdAt: permission.createdAt,
-        updatedAt: permission.updatedAt,
-      })
-      .from(rolePermission)
-      .innerJoin(permission, eq(rolePermission.permissionId, permission.id))
-      .where(inArray(rolePermission.roleId, roleIds));
-
-    return result;
+    const { permissions } = await getUserAccess(userId);
+    return permissions;
   }
 );
 
@@ -277,30 +387,8 @@ export const getUserPermissions = cache(
  */
 export const hasPermission = cache(
   async (userId: string, permissionCode: string): Promise<boolean> => {
-    const permissions = await getUserPermissions(userId);
-    const permissionCodes = permissions.map((p) => p.code);
-
-    // Check exact match
-    if (permissionCodes.includes(permissionCode)) {
-      return true;
-    }
-
-    // Check wildcard match
-    // If user has "admin.*", they have all "admin.xxx" permissions
-    const parts = permissionCode.split('.');
-    for (let i = parts.length - 1; i > 0; i--) {
-      const wildcard = parts.slice(0, i).join('.') + '.*';
-      if (permissionCodes.includes(wildcard)) {
-        return true;
-      }
-    }
-
-    // Check if user has "*" (super admin)
-    if (permissionCodes.includes('*')) {
-      return true;
-    }
-
-    return false;
+    const { matcher } = await getUserAccess(userId);
+    return matchPermission(matcher, permissionCode);
   }
 );
 
@@ -373,6 +461,7 @@ export async function assignRoleToUser(
       updatedAt,
     })
     .returning();
+  invalidateUserAccess(userId);
   return result;
 }
 
@@ -386,6 +475,7 @@ export async function removeRoleFromUser(
   await db()
     .delete(userRole)
     .where(and(eq(userRole.userId, userId), eq(userRole.roleId, roleId)));
+  invalidateUserAccess(userId);
 }
 
 /**
@@ -408,6 +498,7 @@ export async function assignRolesToUser(
       );
     }
   });
+  invalidateUserAccess(userId);
 }
 
 /**
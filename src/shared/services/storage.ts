@@ -1,5 +1,5 @@
 import { R2Provider, S3Provider, StorageManager } from '@/extensions/storage';
-import { Configs, getAllConfigs } from '@/shared/models/config';
+import { Configs, createConfigsMemo } from '@/shared/models/config';
 
 /**
  * get storage service with configs
@@ -50,9 +50,9 @@ export function getStorageServiceWithConfigs(configs: Configs) {
 }
 
 /**
- * global storage service
+ * global storage service, rebuilt when the configs snapshot changes
  */
-let storageService: StorageManager | null = null;
+const storageService = createConfigsMemo(getStorageServiceWithConfigs);
 
 /**
  * get storage service instance
@@ -60,10 +60,5 @@ let storageService: StorageManager | null = null;
 export async function getStorageService(
   configs?: Configs
 ): Promise<StorageManager> {
-  if (!configs) {
-    configs = await getAllConfigs();
-  }
-  storageService = getStorageServiceWithConfigs(configs);
-
-  return storageService;
+  return storageService(configs);
 }
@@ -0,0 +1,433 @@
+import { AITaskStatus } from '@/extensions/ai';
+import { evolinkAPI } from '@/extensions/ai/evolink';
+import { replicateAPI } from '@/extensions/ai/replicate';
+import {
+  findAITaskByProviderTaskId,
+  updateAITaskById,
+} from '@/shared/models/ai_task';
+
+/**
+ * Shared video task status layer.
+ *
+ * Every viewer of a task reads from the same in-process cache, and each task
+ * is polled upstream by at most one loop (with adaptive backoff) regardless of
+ * how many clients are subscribed. Provider webhooks feed the same cache, so a
+ * callback immediately pushes the new status to every subscriber.
+ */
+
+export type VideoTaskProvider = 'evolink' | 'replicate';
+
+export interface VideoTaskStatus {
+  provider: VideoTaskProvider;
+  taskId: string;
+  status: string;
+  progress: number | null;
+  videoUrl: string | null;
+  coverUrl?: string | null;
+  duration?: number | null;
+  width?: number | null;
+  height?: number | null;
+  error: any;
+  updatedAt: number;
+}
+
+type Listener = (status: VideoTaskStatus) => void;
+
+interface TaskEntry {
+  status?: VideoTaskStatus;
+  expiresAt: number;
+  inflight?: Promise<VideoTaskStatus>;
+  listeners: Set<Listener>;
+  timer?: ReturnType<typeof setTimeout>;
+  interval: number;
+  persistedStatus?: string;
+}
+
+type Store = Map<string, TaskEntry>;
+
+declare global {
+  // eslint-disable-next-line no-var
+  var __videoTaskStatusStore: Store | undefined;
+}
+
+// cache ttl for in-progress tasks, shorter than the smallest poll interval
+const STATUS_TTL_MS = 1000;
+// terminal statuses never change, keep them around for late viewers
+const TERMINAL_TTL_MS = 10 * 60 * 1000;
+// adaptive backoff for the shared upstream poller
+const MIN_POLL_INTERVAL_MS = 1500;
+const MAX_POLL_INTERVAL_MS = 15000;
+const POLL_BACKOFF_FACTOR = 1.5;
+// drop idle entries so the store does not grow without bound
+const MAX_ENTRIES = 1000;
+
+const COMPLETED_STATUSES = ['completed', 'succeeded', 'success'];
+const FAILED_STATUSES = ['failed', 'error'];
+const CANCELED_STATUSES = ['canceled', 'cancelled'];
+
+function getStore(): Store {
+  if (!globalThis.__videoTaskStatusStore) {
+    globalThis.__videoTaskStatusStore = new Map();
+  }
+  return globalThis.__videoTaskStatusStore;
+}
+
+function buildKey(provider: string, taskId: string) {
+  return `${provider}:${taskId}`;
+}
+
+function getEntry(provider: string, taskId: string): TaskEntry {
+  const store = getStore();
+  const key = buildKey(provider, taskId);
+  let entry = store.get(key);
+  if (!entry) {
+    if (store.size >= MAX_ENTRIES) {
+      evictIdleEntries(store);
+    }
+    entry = {
+      expiresAt: 0,
+      listeners: new Set(),
+      interval: MIN_POLL_INTERVAL_MS,
+    };
+    store.set(key, entry);
+  }
+  return entry;
+}
+
+function evictIdleEntries(store: Store) {
+  const now = Date.now();
+  // Map keeps insertion order, so the oldest entries are checked first.
+  for (const [key, entry] of store) {
+    if (entry.listeners.size > 0 || entry.inflight) continue;
+    if (entry.expiresAt < now || store.size >= MAX_ENTRIES) {
+      store.delete(key);
+    }
+    if (store.size < MAX_ENTRIES / 2) break;
+  }
+}
+
+export function isSupportedVideoTaskProvider(
+  provider?: string | null
+): provider is VideoTaskProvider {
+  return provider === 'evolink' || provider === 'replicate';
+}
+
+export function isTerminalVideoTaskStatus(status?: string | null) {
+  const normalized = String(status || '').toLowerCase();
+  return (
+    COMPLETED_STATUSES.includes(normalized) ||
+    FAILED_STATUSES.includes(normalized) ||
+    CANCELED_STATUSES.includes(normalized)
+  );
+}
+
+/**
+ * map provider status to ai task status
+ */
+export function toAITaskStatus(status?: string | null): AITaskStatus {
+  const normalized = String(status || '').toLowerCase();
+  if (COMPLETED_STATUSES.includes(normalized)) return AITaskStatus.SUCCESS;
+  if (FAILED_STATUSES.includes(normalized)) return AITaskStatus.FAILED;
+  if (CANCELED_STATUSES.includes(normalized)) return AITaskStatus.CANCELED;
+  if (normalized === 'processing' || normalized === 'in_progress') {
+    return AITaskStatus.PROCESSING;
+  }
+  return AITaskStatus.PENDING;
+}
+
+const extractVideoUrl = (value: any): string | null => {
+  if (!value) return null;
+  if (typeof value === 'string') {
+    return value.includes('http') ? value : null;
+  }
+  if (typeof value !== 'object') return null;
+
+  const candidate =
+    value.video_url ??
+    value.videoUrl ??
+    value.url ??
+    value.uri ??
+    value.video ??
+    value.src ??
+    value.file ??
+    value.download_url;
+  if (candidate && typeof candidate === 'string' && candidate.includes('http')) {
+    return candidate;
+  }
+  return null;
+};
+
+const findDeepVideoUrl = (value: any, visited = new Set<any>()): string | null => {
+  if (!value || visited.has(value)) return null;
+  if (typeof value === 'string') {
+    if (value.startsWith('http')) return value;
+    return null;
+  }
+  if (typeof value !== 'object') return null;
+
+  visited.add(value);
+
+  if (Array.isArray(value)) {
+    for (const item of value) {
+      const url = extractVideoUrl(item) || findDeepVideoUrl(item, visited);
+      if (url) return url;
+    }
+    return null;
+  }
+
+  const direct = extractVideoUrl(value);
+  if (direct) return direct;
+
+  for (const val of Object.values(value)) {
+    const url = extractVideoUrl(val) || findDeepVideoUrl(val, visited);
+    if (url) return url;
+  }
+
+  return null;
+};
+
+const normalizeReplicateOutput = (output: any) => {
+  if (!output) return null;
+  if (typeof output === 'string') {
+    return output.includes('http') ? output : null;
+  }
+  if (Array.isArray(output)) {
+    for (const item of output) {
+      const url = extractVideoUrl(item);
+      if (url) return url;
+    }
+    // If array items are objects, try to get their first property value
+    for (const item of output) {
+      if (typeof item === 'object' && item !== null) {
+        for (const val of Object.values(item)) {
+          if (typeof val === 'string' && val.includes('http')) return val;
+        }
+      }
+    }
+    return null;
+  }
+  if (typeof output === 'object') {
+    // Try to find URL in object values
+    for (const val of Object.values(output)) {
+      if (typeof val === 'string' && val.includes('http')) return val;
+    }
+  }
+  return extractVideoUrl(output);
+};
+
+/**
+ * query task status from the provider, bypassing the cache
+ */
+export async function fetchVideoTaskStatus(
+  provider: VideoTaskProvider,
+  taskId: string
+): Promise<VideoTaskStatus> {
+  if (provider === 'evolink') {
+    const result = await evolinkAPI.getTaskStatus(taskId);
+
+    const videoUrl =
+      result.result?.video_url ||
+      extractVideoUrl(result.result) ||
+      findDeepVideoUrl(result.result) ||
+      findDeepVideoUrl(result as any);
+
+    return {
+      provider,
+      taskId: result.id || taskId,
+      status: result.status,
+      progress: result.progress ?? null,
+      videoUrl,
+      coverUrl: result.result?.cover_url || null,
+      duration: result.result?.duration || null,
+      width: result.result?.width || null,
+      height: result.result?.height || null,
+      error: result.error || null,
+      updatedAt: Date.now(),
+    };
+  }
+
+  const result = await replicateAPI.getPredictionStatus(taskId);
+
+  const videoUrl =
+    normalizeReplicateOutput(result.output) ||
+    findDeepVideoUrl(result.output) ||
+    findDeepVideoUrl(result as any);
+
+  return {
+    provider,
+    taskId: result.id || taskId,
+    status: result.status,
+    progress: result?.progress ?? null,
+    videoUrl,
+    error: result?.error || null,
+    updatedAt: Date.now(),
+  };
+}
+
+/**
+ * persist status changes to the ai_task row, once per status transition
+ */
+async function persistVideoTaskStatus(entry: TaskEntry, status: VideoTaskStatus) {
+  if (entry.persistedStatus === status.status) {
+    return;
+  }
+  entry.persistedStatus = status.status;
+
+  try {
+    const task = await findAITaskByProviderTaskId({
+      provider: status.provider,
+      taskId: status.taskId,
+    });
+    if (!task) {
+      return;
+    }
+
+    const taskStatus = toAITaskStatus(status.status);
+    if (task.status === taskStatus) {
+      return;
+    }
+
+    await updateAITaskById(task.id, {
+      status: taskStatus,
+      taskResult: JSON.stringify(status),
+      creditId: task.creditId, // refund credits if task failed
+    });
+  } catch (e) {
+    // allow a retry on the next status update
+    entry.persistedStatus = undefined;
+    console.log('persist video task status failed:', e);
+  }
+}
+
+/**
+ * publish a status into the cache and push it to all subscribers
+ */
+export async function publishVideoTaskStatus(status: VideoTaskStatus) {
+  const entry = getEntry(status.provider, status.taskId);
+  const terminal = isTerminalVideoTaskStatus(status.status);
+
+  const previous = entry.status;
+  entry.status = status;
+  entry.expiresAt = Date.now() + (terminal ? TERMINAL_TTL_MS : STATUS_TTL_MS);
+
+  // back off while nothing changes, poll fast again once progress moves
+  if (
+    previous &&
+    previous.status === status.status &&
+    previous.progress === status.progress
+  ) {
+    entry.interval = Math.min(
+      MAX_POLL_INTERVAL_MS,
+      Math.round(entry.interval * POLL_BACKOFF_FACTOR)
+    );
+  } else {
+    entry.interval = MIN_POLL_INTERVAL_MS;
+  }
+
+  for (const listener of entry.listeners) {
+    try {
+      listener(status);
+    } catch (e) {
+      console.log('video task status listener failed:', e);
+    }
+  }
+
+  if (terminal) {
+    stopPolling(entry);
+  }
+
+  await persistVideoTaskStatus(entry, status);
+}
+
+/**
+ * get task status, served from cache when fresh.
+ * concurrent callers share a single upstream request.
+ */
+export async function getVideoTaskStatus(
+  provider: VideoTaskProvider,
+  taskId: string,
+  { force = false }: { force?: boolean } = {}
+): Promise<VideoTaskStatus> {
+  const entry = getEntry(provider, taskId);
+
+  if (!force && entry.status && entry.expiresAt > Date.now()) {
+    return entry.status;
+  }
+
+  if (entry.inflight) {
+    return entry.inflight;
+  }
+
+  entry.inflight = fetchVideoTaskStatus(provider, taskId)
+    .then(async (status) => {
+      await publishVideoTaskStatus(status);
+      return status;
+    })
+    .finally(() => {
+      entry.inflight = undefined;
+    });
+
+  return entry.inflight;
+}
+
+function stopPolling(entry: TaskEntry) {
+  if (entry.timer) {
+    clearTimeout(entry.timer);
+    entry.timer = undefined;
+  }
+}
+
+function schedulePoll(provider: VideoTaskProvider, taskId: string) {
+  const entry = getEntry(provider, taskId);
+  if (entry.timer || entry.listeners.size === 0) {
+    return;
+  }
+  if (entry.status && isTerminalVideoTaskStatus(entry.status.status)) {
+    return;
+  }
+
+  entry.timer = setTimeout(async () => {
+    entry.timer = undefined;
+    if (entry.listeners.size === 0) {
+      return;
+    }
+
+    try {
+      await getVideoTaskStatus(provider, taskId);
+    } catch (e) {
+      console.log('poll video task status failed:', e);
+      entry.interval = Math.min(
+        MAX_POLL_INTERVAL_MS,
+        Math.round(entry.interval * POLL_BACKOFF_FACTOR)
+      );
+    }
+
+    schedulePoll(provider, taskId);
+  }, entry.interval);
+}
+
+/**
+ * subscribe to status updates of a task.
+ * the first subscriber starts the shared poller, the last one stops it.
+ */
+export function subscribeVideoTaskStatus(
+  provider: VideoTaskProvider,
+  taskId: string,
+  listener: Listener
+): () => void {
+  const entry = getEntry(provider, taskId);
+  entry.listeners.add(listener);
+
+  if (entry.status) {
+    listener(entry.status);
+  }
+
+  schedulePoll(provider, taskId);
+
+  return () => {
+    entry.listeners.delete(listener);
+    if (entry.listeners.size === 0) {
+      stopPolling(entry);
+    }
+  };
+}